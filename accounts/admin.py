@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.contrib.postgres.search import SearchQuery
 from .models import CustomUser, FarmerProfile, ConsumerProfile
 
 # Customizing the CustomUser admin panel
@@ -25,11 +26,23 @@ class CustomUserAdmin(UserAdmin):
 # Admin for FarmerProfile
 class FarmerProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'farm_name', 'farm_location', 'farm_size', 'products')
-    search_fields = ('user__email', 'farm_name', 'products')
+    list_select_related = ('user',)  # `user` is rendered on every row
+    search_fields = ('user__email', 'farm_name')
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Also match `products` through its full-text index instead of a substring scan.
+        """
+        products_match = queryset.filter(products_tsv=SearchQuery(search_term, config='english'))
+        queryset, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            queryset |= products_match
+        return queryset, may_have_duplicates
 
 # Admin for ConsumerProfile
 class ConsumerProfileAdmin(admin.ModelAdmin):
     list_display = ('user',  'delivery_address')
+    list_select_related = ('user',)  # `user` is rendered on every row
     search_fields = ('user__email', 'preferred_products')
 
 # Register all models
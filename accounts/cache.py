@@ -0,0 +1,185 @@
+import functools
+import hashlib
+import logging
+import time
+from django.conf import settings
+from django.core.cache import cache
+from .models import CustomUser
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+USER_CACHE_TIMEOUT = 60 * 60  # 1 hour
+EMAIL_EXISTS_TIMEOUT = 60  # Absorbs repeated checks from a signup form
+PASSWORD_RESET_COOLDOWN = 10 * 60  # At most one reset email per address per 10 minutes
+
+# RedisBloom filter of every registered email, and the marker set once it is fully built
+EMAIL_BLOOM_KEY = "emails:bloom"
+EMAIL_BLOOM_READY_KEY = "emails:bloom:ready"
+
+
+def _user_version_key(user_id):
+    return f"user:{user_id}:ver"
+
+
+def get_cached_user(user_id):
+    """
+    Return the user with both role profiles joined, served from the cache when possible.
+
+    The cache key embeds a per-user version number, so bumping the version with
+    `invalidate_cached_user` makes every previously cached copy unreachable.
+
+    Raises:
+        CustomUser.DoesNotExist: If no user has the given primary key.
+    """
+    version_key = _user_version_key(user_id)
+    version = cache.get(version_key, 0)
+    key = f"user:{user_id}:v{version}"
+
+    user = cache.get(key)
+    if user is None:
+        user = CustomUser.objects.select_related('farmer_profile', 'consumer_profile').get(pk=user_id)
+        cache.set(key, user, USER_CACHE_TIMEOUT)
+        # The version must outlive every entry cached under it; once it expires the
+        # count restarts, and a surviving older entry would be served again
+        if not cache.add(version_key, version, USER_CACHE_TIMEOUT):
+            cache.touch(version_key, USER_CACHE_TIMEOUT)
+    return user
+
+
+def invalidate_cached_user(user_id):
+    """
+    Bump the cache version of a user so the next request reloads it from the database.
+    """
+    key = _user_version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # No version stored yet
+        cache.set(key, 1, USER_CACHE_TIMEOUT)
+    else:
+        cache.touch(key, USER_CACHE_TIMEOUT)
+
+
+def _blacklisted_token_key(jti):
+    return f"jwt:bl:{jti}"
+
+
+def mark_token_blacklisted(jti, exp):
+    """
+    Record a blacklisted token in the cache until it expires.
+    """
+    ttl = exp - int(time.time())
+    if ttl > 0:
+        cache.set(_blacklisted_token_key(jti), 1, ttl)
+
+
+def is_token_blacklisted(jti):
+    """
+    Return True if the token was recorded by `mark_token_blacklisted`.
+
+    A False answer is not conclusive: the database blacklist stays authoritative.
+    """
+    return cache.get(_blacklisted_token_key(jti)) is not None
+
+
+def _email_exists_key(email):
+    # Hash the address so arbitrary request input is always a valid cache key
+    return f"email_exists:{hashlib.sha256(email.lower().encode()).hexdigest()}"
+
+
+def _password_reset_key(email):
+    return f"pwreset:{hashlib.sha256(email.lower().encode()).hexdigest()}"
+
+
+def claim_password_reset(email):
+    """
+    Return True if no password reset was requested for this email within the cooldown.
+
+    The check and the claim are a single atomic `cache.add`, so concurrent
+    requests for the same address cannot both get through.
+    """
+    return cache.add(_password_reset_key(email), 1, PASSWORD_RESET_COOLDOWN)
+
+
+def release_password_reset(email):
+    """
+    Give back a claim taken by `claim_password_reset`, for a reset email that was never queued.
+    """
+    cache.delete(_password_reset_key(email))
+
+
+def email_exists(email):
+    """
+    Return whether a user with the given email exists, cached for a short time.
+
+    Emails the bloom filter has never seen are answered without touching the cache
+    or the database.
+    """
+    if not email_may_exist(email):
+        return False
+    return cache.get_or_set(
+        _email_exists_key(email),
+        lambda: CustomUser.objects.filter(email__iexact=email).exists(),
+        EMAIL_EXISTS_TIMEOUT,
+    )
+
+
+def invalidate_email_exists(*emails):
+    """
+    Forget cached existence checks for the given emails.
+    """
+    cache.delete_many([_email_exists_key(email) for email in emails])
+
+
+@functools.cache
+def get_bloom_client():
+    """
+    Return a Redis client for the email bloom filter, or None if Redis is not configured.
+    """
+    if redis is None or not settings.REDIS_URL:
+        return None
+    return redis.Redis.from_url(settings.REDIS_URL)
+
+
+def email_may_exist(email):
+    """
+    Return False only if the bloom filter is built and has definitely not seen the email.
+    """
+    client = get_bloom_client()
+    if client is None:
+        return True
+    try:
+        ready, seen = (
+            client.pipeline(transaction=False)
+            .exists(EMAIL_BLOOM_READY_KEY)
+            .execute_command('BF.EXISTS', EMAIL_BLOOM_KEY, email.lower())
+            .execute()
+        )
+    except redis.RedisError:
+        # Server down or RedisBloom not loaded: let the database answer
+        return True
+    return not ready or bool(seen)
+
+
+def add_emails_to_bloom(*emails):
+    """
+    Record newly registered emails in the bloom filter.
+    """
+    client = get_bloom_client()
+    if client is None or not emails:
+        return
+    try:
+        client.execute_command('BF.MADD', EMAIL_BLOOM_KEY, *(email.lower() for email in emails))
+    except redis.RedisError:
+        # The filter is now missing emails: stop trusting it until it is rebuilt
+        # with `manage.py rebuild_email_bloom`
+        logger.exception("Could not add emails to the bloom filter")
+        try:
+            client.delete(EMAIL_BLOOM_READY_KEY)
+        except redis.RedisError:
+            logger.error("Could not invalidate the email bloom filter; rebuild it before relying on it")
@@ -0,0 +1,51 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from accounts.hashers import TunedArgon2PasswordHasher
+
+
+class Command(BaseCommand):
+    help = "Time Argon2 hashing for increasing time costs and suggest one that fits a target duration."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target-ms', type=float, default=50, help="Target time per hash in milliseconds (default=50).")
+        parser.add_argument('--memory-cost', type=int, default=TunedArgon2PasswordHasher.memory_cost, help="Memory cost in KiB.")
+        parser.add_argument('--parallelism', type=int, default=TunedArgon2PasswordHasher.parallelism, help="Number of lanes.")
+        parser.add_argument('--max-time-cost', type=int, default=10, help="Highest time cost to try (default=10).")
+        parser.add_argument('--rounds', type=int, default=5, help="Hashes timed per setting (default=5).")
+
+    def handle(self, *args, **options):
+        hasher = TunedArgon2PasswordHasher()
+        hasher.memory_cost = options['memory_cost']
+        hasher.parallelism = options['parallelism']
+        salt = hasher.salt()
+
+        self.stdout.write(
+            f"memory_cost={hasher.memory_cost} KiB, parallelism={hasher.parallelism}, "
+            f"target={options['target_ms']:.0f} ms"
+        )
+
+        best = None
+        for time_cost in range(1, options['max_time_cost'] + 1):
+            hasher.time_cost = time_cost
+            timings = []
+            for _ in range(options['rounds']):
+                start = time.perf_counter()
+                hasher.encode("benchmark-password", salt)
+                timings.append((time.perf_counter() - start) * 1000)
+            median_ms = statistics.median(timings)
+            self.stdout.write(f"  time_cost={time_cost}: {median_ms:.1f} ms")
+
+            if median_ms > options['target_ms']:
+                break
+            best = time_cost
+
+        if best is None:
+            self.stdout.write(self.style.WARNING(
+                "Even time_cost=1 exceeds the target; lower --memory-cost or raise --target-ms."
+            ))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Suggested: ARGON2_TIME_COST={best} ARGON2_MEMORY_COST={hasher.memory_cost} "
+            f"ARGON2_PARALLELISM={hasher.parallelism}"
+        ))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from accounts.cache import EMAIL_BLOOM_KEY, EMAIL_BLOOM_READY_KEY, get_bloom_client, redis
+from accounts.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Rebuild the RedisBloom filter of registered emails used by check_email."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--error-rate', type=float, default=0.01, help="Target false positive rate (default=0.01).")
+        parser.add_argument('--batch-size', type=int, default=10000, help="Emails sent per BF.MADD (default=10000).")
+
+    def handle(self, *args, **options):
+        client = get_bloom_client()
+        if client is None:
+            raise CommandError("REDIS_URL is not configured.")
+
+        # check_email falls back to the database until the filter is complete
+        client.delete(EMAIL_BLOOM_READY_KEY, EMAIL_BLOOM_KEY)
+        capacity = max(CustomUser.objects.count() * 2, 1000)
+        try:
+            client.execute_command('BF.RESERVE', EMAIL_BLOOM_KEY, options['error_rate'], capacity)
+        except redis.ResponseError as e:
+            if 'exists' not in str(e):
+                raise CommandError(f"Could not create the bloom filter: {e}")
+            # A signup created it in the meantime; keep adding to that one
+
+        batch = []
+        added = 0
+        for email in CustomUser.objects.values_list('email', flat=True).iterator(chunk_size=options['batch_size']):
+            batch.append(email.lower())
+            if len(batch) >= options['batch_size']:
+                client.execute_command('BF.MADD', EMAIL_BLOOM_KEY, *batch)
+                added += len(batch)
+                batch = []
+        if batch:
+            client.execute_command('BF.MADD', EMAIL_BLOOM_KEY, *batch)
+            added += len(batch)
+
+        client.set(EMAIL_BLOOM_READY_KEY, 1)
+        self.stdout.write(self.style.SUCCESS(f"Added {added} emails to the bloom filter."))
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-14 04:04
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_remove_consumerprofile_preferred_products_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='farmerprofile',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['farm_name'], name='idx_farm_name_gist', opclasses=['gist_trgm_ops(siglen=64)']),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.6 on 2026-10-14 04:05
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_farmerprofile_idx_farm_name_gist'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='farmerprofile',
+            name='products_tsv',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.SearchVector('products', config='english'), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='farmerprofile',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['products_tsv'], name='idx_farm_products_tsv'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.1.6 on 2026-10-14 04:06
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+INDEX_NAME = 'ux_customuser_email_upper'
+
+
+def check_no_case_duplicates(apps, schema_editor):
+    """
+    Fail with a clear message if emails differing only in case would break the unique index.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT COUNT(*) FROM (SELECT 1 FROM "accounts_customuser" '
+            'GROUP BY UPPER("email") HAVING COUNT(*) > 1) AS duplicates'
+        )
+        (duplicates,) = cursor.fetchone()
+    if duplicates:
+        raise RuntimeError(
+            f"{duplicates} email address(es) are registered more than once in different letter "
+            f"case, so {INDEX_NAME} cannot be built. Find them with: SELECT UPPER(email), "
+            "COUNT(*) FROM accounts_customuser GROUP BY 1 HAVING COUNT(*) > 1; "
+            "merge or rename those users, then run migrate again."
+        )
+
+
+class Migration(migrations.Migration):
+    atomic = False  # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+
+    dependencies = [
+        ('accounts', '0004_farmerprofile_products_tsv'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        # Build the unique index without locking the users table against writes
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(check_no_case_duplicates, migrations.RunPython.noop),
+                migrations.RunSQL(
+                    [
+                        # A failed concurrent build leaves an INVALID index behind; start over
+                        f'DROP INDEX CONCURRENTLY IF EXISTS "{INDEX_NAME}"',
+                        f'CREATE UNIQUE INDEX CONCURRENTLY "{INDEX_NAME}" ON "accounts_customuser" (UPPER("email"))',
+                    ],
+                    reverse_sql=f'DROP INDEX CONCURRENTLY IF EXISTS "{INDEX_NAME}"',
+                ),
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='customuser',
+                    constraint=models.UniqueConstraint(django.db.models.functions.text.Upper('email'), name=INDEX_NAME),
+                ),
+            ],
+        ),
+    ]
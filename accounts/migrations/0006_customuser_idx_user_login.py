@@ -0,0 +1,22 @@
+# Generated by Django 5.1.6 on 2026-10-14 04:08
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False  # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+
+    dependencies = [
+        ('accounts', '0005_customuser_email_upper'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='customuser',
+            index=models.Index(fields=['email'], include=('password', 'is_active', 'role', 'id'), name='idx_user_login'),
+        ),
+        # Refresh the visibility map so the planner can use index-only scans right away
+        migrations.RunSQL('VACUUM ANALYZE accounts_customuser', reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.6 on 2026-10-14 05:12
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def fill_role_profile_cache(apps, schema_editor):
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    FarmerProfile = apps.get_model('accounts', 'FarmerProfile')
+    ConsumerProfile = apps.get_model('accounts', 'ConsumerProfile')
+
+    # Flushed every BATCH_SIZE users so memory stays flat however many users there are
+    users = []
+    for profile in FarmerProfile.objects.select_related('user').iterator(chunk_size=BATCH_SIZE):
+        profile.user.role_profile_cache = {'farm_name': profile.farm_name, 'farm_location': profile.farm_location}
+        users.append(profile.user)
+        if len(users) >= BATCH_SIZE:
+            CustomUser.objects.bulk_update(users, ['role_profile_cache'])
+            users = []
+    for profile in ConsumerProfile.objects.select_related('user').iterator(chunk_size=BATCH_SIZE):
+        profile.user.role_profile_cache = {'delivery_address': profile.delivery_address}
+        users.append(profile.user)
+        if len(users) >= BATCH_SIZE:
+            CustomUser.objects.bulk_update(users, ['role_profile_cache'])
+            users = []
+    if users:
+        CustomUser.objects.bulk_update(users, ['role_profile_cache'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_customuser_idx_user_login'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='role_profile_cache',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.RunPython(fill_role_profile_cache, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-14 04:11
+
+import accounts.utils
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_customuser_role_profile_cache'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='id',
+            field=models.UUIDField(default=accounts.utils.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+    ]
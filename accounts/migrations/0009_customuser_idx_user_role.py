@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-14 05:12
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False  # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+
+    dependencies = [
+        ('accounts', '0008_customuser_id_uuid7'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='customuser',
+            index=models.Index(fields=['role'], name='idx_user_role'),
+        ),
+    ]
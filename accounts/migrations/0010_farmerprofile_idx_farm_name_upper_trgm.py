@@ -0,0 +1,21 @@
+# Generated by Django 5.1.6 on 2026-10-14 06:41
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    atomic = False  # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+
+    dependencies = [
+        ('accounts', '0009_customuser_idx_user_role'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='farmerprofile',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('farm_name'), name='gin_trgm_ops'), name='idx_farm_name_upper_trgm'),
+        ),
+    ]
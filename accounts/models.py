@@ -1,8 +1,14 @@
-import uuid
-from django.db import models
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from django.conf import settings
+from django.db import models, transaction
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import AbstractUser, BaseUserManager
-from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.indexes import GinIndex, GistIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db.models.functions import Upper
 from products.models import Product
+from .utils import uuid7
 
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -49,8 +55,78 @@ class CustomUserManager(BaseUserManager):
 
         return self.create_user(email, password, **extra_fields)
 
+    def bulk_register(self, rows, batch_size=500, max_rows=None):
+        """
+        Creates users and their role profiles in bulk.
+
+        Passwords are hashed up front and users and profiles are inserted with
+        `bulk_create`, so the profile signals do not fire and the whole batch
+        costs three INSERT statements instead of several round-trips per user.
+
+        Args:
+            rows (list[dict]): Validated user data, each with at least `email`,
+                `password` and `role`.
+            batch_size (int): Maximum number of rows per INSERT (default=500).
+            max_rows (int): Largest batch accepted (default=`BULK_REGISTER_MAX_USERS`).
+
+        Raises:
+            ValueError: If there are more than `max_rows` rows.
+
+        Returns:
+            list[User]: The created users.
+        """
+        rows = [dict(row) for row in rows]
+        if max_rows is None:
+            max_rows = settings.BULK_REGISTER_MAX_USERS
+        # Checked before hashing, which is where the time and memory go
+        if len(rows) > max_rows:
+            raise ValueError(f"Cannot register more than {max_rows} users at once, got {len(rows)}.")
+        raw_passwords = [row.pop('password', None) for row in rows]
+
+        # Hashing dominates the cost of a batch; the hashers release the GIL, so run a few in
+        # parallel, bounded because each Argon2 hash holds ARGON2_MEMORY_COST of memory
+        with ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS) as pool:
+            passwords = list(pool.map(make_password, raw_passwords))
+
+        users = []
+        for row, password in zip(rows, passwords):
+            row.pop('confirm_password', None)
+            row['email'] = self.normalize_email(row['email'])
+            users.append(self.model(password=password, **row))
+
+        farmer_profiles = [FarmerProfile(user=user) for user in users if user.role == 'farmer']
+        consumer_profiles = [ConsumerProfile(user=user) for user in users if user.role == 'consumer']
+        # bulk_create skips the signals that normally fill the cache
+        for profile in farmer_profiles + consumer_profiles:
+            profile.user.role_profile_cache = profile.role_profile_summary()
+
+        # Imported here because accounts.cache imports this module
+        from .cache import add_emails_to_bloom, invalidate_email_exists
+
+        with transaction.atomic(using=self._db):
+            users = self.bulk_create(users, batch_size=batch_size)
+            FarmerProfile.objects.bulk_create(farmer_profiles, batch_size=batch_size)
+            ConsumerProfile.objects.bulk_create(consumer_profiles, batch_size=batch_size)
+            # bulk_create skips the user signals too, which keep the email lookups current
+            emails = [user.email for user in users]
+            transaction.on_commit(partial(invalidate_email_exists, *emails), using=self._db)
+            transaction.on_commit(partial(add_emails_to_bloom, *emails), using=self._db)
+        return users
+
+    def get_by_natural_key(self, username):
+        """
+        Fetch a user for login by email, loading only the columns login needs.
+
+        The selected columns are all covered by the `idx_user_login` index, so
+        the lookup can be answered by an index-only scan.
+        """
+        return self.only(*LOGIN_FIELDS).get(**{self.model.USERNAME_FIELD: username})
+
+# Columns read while authenticating a login (the primary key is always loaded)
+LOGIN_FIELDS = ('email', 'password', 'is_active', 'role')
+
 class CustomUser(AbstractUser):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, unique=True)  # UUID instead of integer ID
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False, unique=True)  # Time-ordered UUID instead of integer ID
     username = None  # Remove username
 
     ROLE_CHOICES = [
@@ -61,12 +137,27 @@ class CustomUser(AbstractUser):
     email = models.EmailField(unique=True)
     phone = models.CharField(max_length=15, blank=True, null=True)
     profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    # Copy of the role profile's display fields, kept current by the profile signals,
+    # so list endpoints can show them without joining the profile tables
+    role_profile_cache = models.JSONField(default=dict, blank=True, editable=False)
 
     objects = CustomUserManager()
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []  # Only email and password are required
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Lets login lookups be answered by an index-only scan
+            models.Index(fields=['email'], include=['password', 'is_active', 'role', 'id'], name='idx_user_login'),
+            # `role` doubles as the is-farmer/is-consumer flag, so role filters need no profile join
+            models.Index(fields=['role'], name='idx_user_role'),
+        ]
+        constraints = [
+            # Matches the UPPER(...) = UPPER(...) SQL Django emits for `email__iexact`
+            models.UniqueConstraint(Upper('email'), name='ux_customuser_email_upper'),
+        ]
+
     def __str__(self):
         """
         Return a string representation of the user.
@@ -81,10 +172,21 @@ class FarmerProfile(models.Model):
     farm_location = models.CharField(max_length=100, blank=True, null=True)
     farm_size = models.CharField(max_length=100, blank=True, null=True)
     products = models.TextField(blank=True, null=True)
+    products_tsv = models.GeneratedField(
+        expression=SearchVector('products', config='english'),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )  # Kept in sync by Postgres for full-text search on `products`
 
     class Meta:
         indexes = [
             GinIndex(name="idx_farm_name", fields=["farm_name"], opclasses=["gin_trgm_ops"]),
+            # GiST supports ordering by trigram distance (`<->`); GIN only serves the filters
+            GistIndex(name="idx_farm_name_gist", fields=["farm_name"], opclasses=["gist_trgm_ops(siglen=64)"]),
+            GinIndex(name="idx_farm_products_tsv", fields=["products_tsv"]),
+            # `farm_name__icontains` compiles to UPPER(farm_name) LIKE UPPER(...), which only an
+            # expression index on UPPER(farm_name) can serve
+            GinIndex(OpClass(Upper("farm_name"), name="gin_trgm_ops"), name="idx_farm_name_upper_trgm"),
         ]
 
     def __str__(self):
@@ -96,6 +198,12 @@ class FarmerProfile(models.Model):
         """
         return self.farm_name if self.farm_name else f"Farmer Profile ({self.user.email})"
 
+    def role_profile_summary(self):
+        """
+        Return the fields mirrored into `CustomUser.role_profile_cache`.
+        """
+        return {'farm_name': self.farm_name, 'farm_location': self.farm_location}
+
 class ConsumerProfile(models.Model):
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True, related_name='consumer_profile')
     preferred_products = models.ManyToManyField(Product, blank=True, related_name='consumers')
@@ -108,3 +216,9 @@ class ConsumerProfile(models.Model):
         Includes the email of the associated user in the format "Consumer Profile (user email)".
         """
         return f"Consumer Profile ({self.user.email})"
+
+    def role_profile_summary(self):
+        """
+        Return the fields mirrored into `CustomUser.role_profile_cache`.
+        """
+        return {'delivery_address': self.delivery_address}
@@ -1,46 +1,90 @@
 from django.contrib.auth.password_validation import validate_password
+from django.db import transaction
 from .models import CustomUser, FarmerProfile, ConsumerProfile
+from .signals import profile_signals_muted
 from products.serializers import ProductSerializer
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from .tokens import CachedBlacklistRefreshToken
+import copy
 import re
 
-class FarmerProfileSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = FarmerProfile
-        fields = ['farm_name', 'farm_location', 'farm_size', 'products']
-        read_only_fields = ['user']
-
+_PHONE_RE = re.compile(r'\A\+\d{10,15}\Z')
 
 def validate_phone(value):
     """
     Validate a phone number. Allows empty values but enforces correct format if provided.
     """
-    if value and not re.match(r'^\+\d{10,15}$', value):  
+    if value and not _PHONE_RE.match(value):
         raise serializers.ValidationError("Phone number must be in international format (e.g., +254712345678).")
     return value
 
 
-class ConsumerProfileSerializer(serializers.ModelSerializer):
-    preferred_products = serializers.SerializerMethodField()  # Use method to safely retrieve products
+def check_passwords_match(data):
+    """
+    Raise a validation error unless `password` and `confirm_password` are equal.
+    """
+    if data.get('password') != data.get('confirm_password'):
+        raise serializers.ValidationError({"password": "Passwords do not match."})
+
+
+class CachedFieldsMixin:
+    """
+    Builds the fields of a ModelSerializer once per class instead of per instance.
+
+    `ModelSerializer.get_fields()` introspects the model every time a serializer is
+    created, although the result only depends on the class. The first result is
+    kept as a prototype and each instance gets its own copy, so bound state is
+    never shared between requests.
+    """
+
+    def get_fields(self):
+        cls = type(self)
+        prototype = cls.__dict__.get('_fields_prototype')
+        if prototype is None:
+            prototype = super().get_fields()
+            cls._fields_prototype = prototype
+        return copy.deepcopy(prototype)
+
+
+class RoleProfileSerializer(serializers.ModelSerializer):
+    """
+    Base serializer for role profiles.
+
+    When nested under a user, the profile relation is only read for users whose
+    role matches `profile_role`, so serializing a user loads at most one profile.
+    """
+    profile_role = None
+
+    def get_attribute(self, instance):
+        if instance.role != self.profile_role:
+            return None
+        return super().get_attribute(instance)
+
+
+class FarmerProfileSerializer(RoleProfileSerializer):
+    profile_role = 'farmer'
+
+    class Meta:
+        model = FarmerProfile
+        fields = ['farm_name', 'farm_location', 'farm_size', 'products']
+        read_only_fields = ['user']
+
+
+class ConsumerProfileSerializer(RoleProfileSerializer):
+    profile_role = 'consumer'
+    preferred_products = ProductSerializer(many=True, read_only=True)
 
     class Meta:
         model = ConsumerProfile
         fields = ['preferred_products', 'delivery_address']
         read_only_fields = ['user']
 
-    def get_preferred_products(self, obj):
-        """
-        Safely get the list of preferred products.
-        Returns an empty list if no products are linked.
-        """
-        if hasattr(obj, 'preferred_products'):
-            products = obj.preferred_products.all()
-            return ProductSerializer(products, many=True).data
-        return []
-
-class CustomUserSerializer(serializers.ModelSerializer):
-    farmer_profile = serializers.SerializerMethodField()
-    consumer_profile = serializers.SerializerMethodField()
+class CustomUserSerializer(CachedFieldsMixin, serializers.ModelSerializer):
+    farmer_profile = FarmerProfileSerializer(read_only=True, allow_null=True)
+    consumer_profile = ConsumerProfileSerializer(read_only=True, allow_null=True)
+    role = serializers.ChoiceField(choices=CustomUser.ROLE_CHOICES, required=False)  # Built once, not per instance
     profile_picture = serializers.ImageField(required=False, allow_null=True)  # Optional
     email = serializers.EmailField(read_only=True)
     phone = serializers.CharField(validators=[validate_phone])
@@ -54,16 +98,6 @@ class CustomUserSerializer(serializers.ModelSerializer):
                   'farmer_profile', 'consumer_profile']
         read_only_fields = ['id', 'email']
 
-    def get_farmer_profile(self, obj):
-        if obj.role == 'farmer' and hasattr(obj, 'farmer_profile'):
-            return FarmerProfileSerializer(obj.farmer_profile).data
-        return None
-
-    def get_consumer_profile(self, obj):
-        if obj.role == 'consumer' and hasattr(obj, 'consumer_profile'):
-            return ConsumerProfileSerializer(obj.consumer_profile).data
-        return None
-
     def validate(self, data):
         """
         Ensure passwords match if provided.
@@ -72,8 +106,7 @@ class CustomUserSerializer(serializers.ModelSerializer):
         confirm_password = data.get('confirm_password')
 
         if password or confirm_password:  # Only validate if either field is provided
-            if password != confirm_password:
-                raise serializers.ValidationError({"password": "Passwords do not match."})
+            check_passwords_match(data)
             validate_password(password)  # Enforce strong password rules
 
         return data
@@ -87,25 +120,62 @@ class CustomUserSerializer(serializers.ModelSerializer):
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
+        update_fields = list(validated_data)
 
         if password:
             instance.set_password(password)  # Securely hash and update password
+            update_fields.append('password')
 
-        instance.save()
+        instance.save(update_fields=update_fields)  # Only write (and signal on) the changed columns
         return instance
 
 
+class UserRegisterListSerializer(serializers.ListSerializer):
+    def validate(self, attrs):
+        """
+        Reject batches that repeat an email, regardless of case.
+
+        Each item's UniqueValidator only checks existing users, so a repeat within
+        the batch would otherwise fail the bulk INSERT on the unique email index.
+        """
+        seen = set()
+        duplicates = []
+        for item in attrs:
+            email = item['email'].lower()
+            if email in seen:
+                duplicates.append(item['email'])
+            seen.add(email)
+        if duplicates:
+            raise serializers.ValidationError(
+                f"Each email may appear only once per batch; repeated: {', '.join(duplicates)}."
+            )
+        return attrs
+
+    def create(self, validated_data):
+        """
+        Register a batch of users with one bulk INSERT per table.
+        """
+        return CustomUser.objects.bulk_register(validated_data)
 
 
-class UserRegisterSerializer(serializers.ModelSerializer):
+class UserRegisterSerializer(CachedFieldsMixin, serializers.ModelSerializer):
+    email = serializers.EmailField(
+        validators=[UniqueValidator(queryset=CustomUser.objects.all(), lookup='iexact')]
+    )  # Emails are unique regardless of case
     password = serializers.CharField(write_only=True, validators=[validate_password])
     confirm_password = serializers.CharField(write_only=True)
     phone = serializers.CharField(validators=[validate_phone])  # Apply phone validation
+    # Lets the registration response be rendered in CustomUserSerializer's shape without a second serializer
+    farmer_profile = FarmerProfileSerializer(read_only=True, allow_null=True)
+    consumer_profile = ConsumerProfileSerializer(read_only=True, allow_null=True)
 
     class Meta:
         model = CustomUser
-        fields = ['id', 'email', 'role', 'first_name', 'last_name', 'phone', 'profile_picture', 'password', 'confirm_password']
+        fields = ['id', 'email', 'first_name', 'last_name', 'role', 'phone', 'profile_picture',
+                  'password', 'confirm_password', 'farmer_profile', 'consumer_profile']
         read_only_fields = ['id']
+        list_serializer_class = UserRegisterListSerializer
+
     def validate(self, data):
         """
         Validate that the password and confirm_password match.
@@ -119,9 +189,7 @@ class UserRegisterSerializer(serializers.ModelSerializer):
         Raises:
             serializers.ValidationError: If the passwords do not match.
         """
-        confirm_password = data.get('confirm_password')  # Store separately instead of removing
-        if data['password'] != confirm_password:
-            raise serializers.ValidationError({"password": "Passwords do not match."})
+        check_passwords_match(data)
         return data
 
     def create(self, validated_data):
@@ -135,22 +203,34 @@ class UserRegisterSerializer(serializers.ModelSerializer):
             CustomUser: The newly created user.
 
         Note:
-            The `role` field is explicitly stored on the user model for use by
-            the signals that handle the creation of the farmer/consumer profile.
+            The farmer/consumer profile is created here, in the same transaction
+            as the user, so the profile signals are muted for this save.
         """
         validated_data.pop('confirm_password', None)
-        user = CustomUser.objects.create_user(
-            email=validated_data['email'],
-            password=validated_data['password'],
-            role=validated_data['role'],  # Store role for signals to use
-            first_name=validated_data.get('first_name', ''),
-            last_name=validated_data.get('last_name', ''), 
-            phone=validated_data.get('phone', ''),
-            profile_picture=validated_data.get('profile_picture', None)
-        )
+        profile_model = FarmerProfile if validated_data['role'] == 'farmer' else ConsumerProfile
+        with transaction.atomic(), profile_signals_muted():
+            user = CustomUser.objects.create_user(
+                email=validated_data['email'],
+                password=validated_data['password'],
+                role=validated_data['role'],
+                first_name=validated_data.get('first_name', ''),
+                last_name=validated_data.get('last_name', ''), 
+                phone=validated_data.get('phone', ''),
+                profile_picture=validated_data.get('profile_picture', None),
+                # Stored with the INSERT, as the muted profile receivers will not fill it
+                role_profile_cache=profile_model().role_profile_summary(),
+            )
+            profile_model.objects.create(user=user)
         return user
 
 
 # Define a serializer for request validation
 class PasswordResetSerializer(serializers.Serializer):
     email = serializers.EmailField(help_text="User's registered email address")
+
+
+class CachedTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Token refresh that checks and records blacklisted refresh tokens in the cache.
+    """
+    token_class = CachedBlacklistRefreshToken
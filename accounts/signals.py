@@ -1,37 +1,71 @@
 import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
 from django.db import transaction
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
+from .cache import add_emails_to_bloom, invalidate_cached_user, invalidate_email_exists
 from .models import CustomUser, FarmerProfile, ConsumerProfile
 
 logger = logging.getLogger(__name__)
 
-VALID_ROLES = {"farmer", "consumer"}
+VALID_ROLES = frozenset({"farmer", "consumer"})
+
+_profile_signals_muted = ContextVar("profile_signals_muted", default=False)
+
+@contextmanager
+def profile_signals_muted():
+    """
+    Skips the profile handlers below for saves made in this context.
+
+    For callers that manage profiles themselves. Scoped to the current thread or
+    task, unlike disconnecting the receivers, so concurrent requests are unaffected.
+    """
+    token = _profile_signals_muted.set(True)
+    try:
+        yield
+    finally:
+        _profile_signals_muted.reset(token)
 
 @receiver(pre_save, sender=CustomUser)
-def switch_role(sender, instance, **kwargs):
+def switch_role(sender, instance, update_fields=None, **kwargs):
     """Deletes the old profile if the user changes roles."""
-    previous_user = None
-
-    if instance.pk:
-        try:
-            previous_user = CustomUser.objects.get(pk=instance.pk)
-            logger.info(f"Previous role: {previous_user.role}, New role: {instance.role}")
-        except CustomUser.DoesNotExist:
-            logger.warning(f"User with pk {instance.pk} not found. Assuming this is a new user.")
-    
-    if previous_user and previous_user.role != instance.role:
+    if _profile_signals_muted.get():
+        return
+    if instance._state.adding:
+        # New users have no previous profile to clean up.
+        return
+    if update_fields is not None and "role" not in update_fields:
+        return
+
+    previous_role = CustomUser.objects.filter(pk=instance.pk).values_list("role", flat=True).first()
+    if previous_role is None:
+        logger.warning(f"User with pk {instance.pk} not found. Assuming this is a new user.")
+        return
+    logger.info("Previous role: %s, New role: %s", previous_role, instance.role)
+
+    if previous_role != instance.role:
+        # The old profile's summary goes with it; the new profile refills it after save
+        instance.role_profile_cache = {}
         with transaction.atomic():
-            if previous_user.role == "farmer":
+            if previous_role == "farmer":
                 FarmerProfile.objects.filter(user=instance).delete()
-                logger.info(f"Deleted FarmerProfile for user {instance.email}")
-            elif previous_user.role == "consumer":
+                logger.info("Deleted FarmerProfile for user %s", instance.email)
+            elif previous_role == "consumer":
                 ConsumerProfile.objects.filter(user=instance).delete()
-                logger.info(f"Deleted ConsumerProfile for user {instance.email}")
+                logger.info("Deleted ConsumerProfile for user %s", instance.email)
 
 @receiver(post_save, sender=CustomUser)
-def create_or_update_profile(sender, instance, created, **kwargs):
+def create_or_update_profile(sender, instance, created, update_fields=None, **kwargs):
     """Creates or updates user profiles based on role."""
+    if kwargs.get("raw") or _profile_signals_muted.get():
+        # Fixture loading and muted callers provide their own profile rows.
+        return
+    if not created and update_fields is not None and "role" not in update_fields:
+        # The role did not change, so the existing profile is still correct.
+        return
+
     if instance.role not in VALID_ROLES:
         logger.error(f"Invalid role '{instance.role}' for user {instance.email}. No profile created.")
         return
@@ -40,14 +74,61 @@ def create_or_update_profile(sender, instance, created, **kwargs):
         if created:
             if instance.role == "farmer":
                 FarmerProfile.objects.create(user=instance)
-                logger.info(f"Created FarmerProfile for user {instance.email}")
+                logger.info("Created FarmerProfile for user %s", instance.email)
             elif instance.role == "consumer":
                 ConsumerProfile.objects.create(user=instance)
-                logger.info(f"Created ConsumerProfile for user {instance.email}")
+                logger.info("Created ConsumerProfile for user %s", instance.email)
         else:
             if instance.role == "farmer":
                 FarmerProfile.objects.get_or_create(user=instance)
-                logger.info(f"Updated FarmerProfile for user {instance.email}")
+                logger.info("Updated FarmerProfile for user %s", instance.email)
             elif instance.role == "consumer":
                 ConsumerProfile.objects.get_or_create(user=instance)
-                logger.info(f"Updated ConsumerProfile for user {instance.email}")
+                logger.info("Updated ConsumerProfile for user %s", instance.email)
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """Drops the cached copy of a user whenever the user row changes."""
+    invalidate_cached_user(instance.pk)
+    invalidate_email_exists(instance.email)
+
+@receiver(post_save, sender=CustomUser)
+def add_email_to_bloom(sender, instance, created, update_fields=None, **kwargs):
+    """Records new and changed emails in the check_email bloom filter."""
+    if created or update_fields is None or "email" in update_fields:
+        add_emails_to_bloom(instance.email)
+
+@receiver(post_save, sender=FarmerProfile)
+@receiver(post_delete, sender=FarmerProfile)
+@receiver(post_save, sender=ConsumerProfile)
+@receiver(post_delete, sender=ConsumerProfile)
+def invalidate_profile_user_cache(sender, instance, **kwargs):
+    """Drops the cached copy of a user whenever one of its profiles changes."""
+    invalidate_cached_user(instance.user_id)
+
+@receiver(post_save, sender=FarmerProfile)
+@receiver(post_save, sender=ConsumerProfile)
+def refresh_role_profile_cache(sender, instance, **kwargs):
+    """Mirrors the profile's display fields onto its user."""
+    if _profile_signals_muted.get():
+        # Muted callers fill role_profile_cache before saving the user
+        return
+    _set_role_profile_cache(instance, instance.role_profile_summary())
+
+@receiver(post_delete, sender=FarmerProfile)
+@receiver(post_delete, sender=ConsumerProfile)
+def clear_role_profile_cache(sender, instance, **kwargs):
+    """Empties the user's mirrored profile fields once the profile is gone."""
+    if _profile_signals_muted.get():
+        return
+    _set_role_profile_cache(instance, {})
+
+def _set_role_profile_cache(profile, summary):
+    # A single UPDATE; saving the user instead would re-run the user signals
+    CustomUser.objects.filter(pk=profile.user_id).update(role_profile_cache=summary)
+    # The profile receivers invalidated before this UPDATE, so a request in between
+    # could have cached the old summary; drop it again once the UPDATE is committed
+    transaction.on_commit(partial(invalidate_cached_user, profile.user_id))
+    if type(profile).user.is_cached(profile):
+        profile.user.role_profile_cache = summary
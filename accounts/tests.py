@@ -1,3 +1,218 @@
-from django.test import TestCase
+import uuid
+from unittest import mock
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils.http import base36_to_int, int_to_base36
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from .cache import is_token_blacklisted
+from .models import CustomUser, FarmerProfile
+from .signals import profile_signals_muted, refresh_role_profile_cache
+from .tokens import password_reset_token_generator
 
-# Create your tests here.
+
+def _with_user(token):
+    token[jwt_settings.USER_ID_CLAIM] = str(uuid.uuid4())
+    return token
+
+
+@mock.patch('accounts.views.blacklist_refresh_token')
+class LogoutViewTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('api_logout')
+        self.user = CustomUser(pk=uuid.uuid4(), is_active=True)
+        # The authenticator's user lookup, answered without a database
+        lookup = mock.patch.object(CustomUser.objects, 'get', return_value=self.user)
+        self.user_lookup = lookup.start()
+        self.addCleanup(lookup.stop)
+        access = AccessToken()
+        access[jwt_settings.USER_ID_CLAIM] = str(self.user.pk)
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {access}'}
+        self.refresh = _with_user(RefreshToken())
+
+    def test_requires_access_token(self, task):
+        response = self.client.post(self.url, {'refresh': str(self.refresh)}, content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('WWW-Authenticate', response)
+        task.delay.assert_not_called()
+
+    def test_rejects_inactive_user(self, task):
+        self.user.is_active = False
+        response = self.client.post(
+            self.url, {'refresh': str(self.refresh)}, content_type='application/json', **self.auth
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['code'], 'user_inactive')
+        task.delay.assert_not_called()
+
+    def test_rejects_deleted_user(self, task):
+        self.user_lookup.side_effect = CustomUser.DoesNotExist
+        response = self.client.post(
+            self.url, {'refresh': str(self.refresh)}, content_type='application/json', **self.auth
+        )
+        self.assertEqual(response.status_code, 401)
+        task.delay.assert_not_called()
+
+    def test_json_body_blacklists_refresh_token(self, task):
+        response = self.client.post(
+            self.url, {'refresh': str(self.refresh)}, content_type='application/json', **self.auth
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'detail': 'Successfully logged out.'})
+        self.assertTrue(is_token_blacklisted(self.refresh[jwt_settings.JTI_CLAIM]))
+        task.delay.assert_called_once_with(str(self.refresh))
+
+    def test_form_encoded_body_blacklists_refresh_token(self, task):
+        response = self.client.post(self.url, {'refresh': str(self.refresh)}, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(is_token_blacklisted(self.refresh[jwt_settings.JTI_CLAIM]))
+        task.delay.assert_called_once_with(str(self.refresh))
+
+    def test_rejects_invalid_refresh_token_in_form_body(self, task):
+        response = self.client.post(self.url, {'refresh': 'not-a-token'}, **self.auth)
+        self.assertEqual(response.status_code, 400)
+        task.delay.assert_not_called()
+
+    def test_without_refresh_token(self, task):
+        response = self.client.post(self.url, {}, content_type='application/json', **self.auth)
+        self.assertEqual(response.status_code, 200)
+        task.delay.assert_not_called()
+
+    def test_rejects_access_token_as_refresh(self, task):
+        response = self.client.post(
+            self.url, {'refresh': str(_with_user(AccessToken()))}, content_type='application/json', **self.auth
+        )
+        self.assertEqual(response.status_code, 400)
+        task.delay.assert_not_called()
+
+    def test_rejects_malformed_json(self, task):
+        response = self.client.post(self.url, b'{', content_type='application/json', **self.auth)
+        self.assertEqual(response.status_code, 400)
+
+    def test_broker_failure_still_logs_out(self, task):
+        task.delay.side_effect = ConnectionError("broker down")
+        with self.assertLogs('accounts.views', level='ERROR'):
+            response = self.client.post(
+                self.url, {'refresh': str(self.refresh)}, content_type='application/json', **self.auth
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(is_token_blacklisted(self.refresh[jwt_settings.JTI_CLAIM]))
+
+
+@override_settings(PASSWORD_RESET_TIMEOUT=60 * 60)
+class PasswordResetTokenTests(SimpleTestCase):
+    def setUp(self):
+        self.user = CustomUser(pk=uuid.uuid4(), password='argon2$argon2id$v=19$m=8,t=1,p=1$c2FsdA$aGFzaA')
+        self.token = password_reset_token_generator.make_token(self.user)
+
+    def test_valid_token(self):
+        self.assertTrue(password_reset_token_generator.check_token(self.user, self.token))
+
+    def test_make_token_for_matches_make_token(self):
+        self.assertEqual(
+            password_reset_token_generator.make_token_for(self.user.pk, self.user.password), self.token
+        )
+
+    def test_expired_token(self):
+        issued = base36_to_int(self.token.split('-')[0])
+        with mock.patch('accounts.tokens.time.time', return_value=issued + 60 * 60):
+            self.assertTrue(password_reset_token_generator.check_token(self.user, self.token))
+        with mock.patch('accounts.tokens.time.time', return_value=issued + 60 * 60 + 1):
+            self.assertFalse(password_reset_token_generator.check_token(self.user, self.token))
+
+    def test_tampered_signature(self):
+        timestamp, signature = self.token.split('-')
+        tampered = f"{timestamp}-{'0' if signature[0] != '0' else '1'}{signature[1:]}"
+        self.assertFalse(password_reset_token_generator.check_token(self.user, tampered))
+
+    def test_tampered_timestamp(self):
+        timestamp, signature = self.token.split('-')
+        tampered = f"{int_to_base36(base36_to_int(timestamp) + 1)}-{signature}"
+        self.assertFalse(password_reset_token_generator.check_token(self.user, tampered))
+
+    def test_password_change_invalidates_token(self):
+        self.user.password = 'argon2$argon2id$v=19$m=8,t=1,p=1$c2FsdA$b3RoZXI'
+        self.assertFalse(password_reset_token_generator.check_token(self.user, self.token))
+
+    def test_other_user(self):
+        other = CustomUser(pk=uuid.uuid4(), password=self.user.password)
+        self.assertFalse(password_reset_token_generator.check_token(other, self.token))
+
+    def test_malformed_token(self):
+        for token in ('', 'no-dash-here', 'zz!-abc', self.token.replace('-', ''), f'{self.token}-x', 12345):
+            self.assertFalse(password_reset_token_generator.check_token(self.user, token))
+
+
+class BulkRegistrationTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('user-bulk-registration')
+        self.client = APIClient()
+        self.row = {'email': 'a@example.com', 'role': 'consumer', 'password': 'x', 'confirm_password': 'x',
+                    'first_name': 'A', 'last_name': 'B', 'phone': '+254712345678'}
+
+    def test_requires_staff(self):
+        self.assertEqual(self.client.post(self.url, [self.row], format='json').status_code, 401)
+        self.client.force_authenticate(CustomUser(pk=uuid.uuid4(), is_staff=False))
+        self.assertEqual(self.client.post(self.url, [self.row], format='json').status_code, 403)
+
+    @override_settings(BULK_REGISTER_MAX_USERS=2)
+    def test_rejects_oversized_batch(self):
+        self.client.force_authenticate(CustomUser(pk=uuid.uuid4(), is_staff=True))
+        response = self.client.post(self.url, [self.row] * 3, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_rejects_empty_batch(self):
+        self.client.force_authenticate(CustomUser(pk=uuid.uuid4(), is_staff=True))
+        self.assertEqual(self.client.post(self.url, [], format='json').status_code, 400)
+
+
+class BulkRegisterManagerTests(SimpleTestCase):
+    @override_settings(BULK_REGISTER_MAX_USERS=2)
+    def test_rejects_oversized_batch_before_hashing(self):
+        rows = [{'email': f'{i}@example.com', 'password': 'x', 'role': 'consumer'} for i in range(3)]
+        with mock.patch('accounts.models.make_password') as make_password:
+            with self.assertRaises(ValueError):
+                CustomUser.objects.bulk_register(rows)
+        make_password.assert_not_called()
+
+
+@mock.patch('accounts.views.email_may_exist', return_value=True)
+@mock.patch('accounts.views.send_password_reset_email')
+class PasswordResetRequestTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('password_reset_request')
+        self.row = (uuid.uuid4(), 'user@example.com', 'argon2$hash')
+
+    def _post(self):
+        with mock.patch('accounts.views.CustomUser.objects') as users:
+            users.filter.return_value.values_list.return_value.first.return_value = self.row
+            return self.client.post(self.url, {'email': 'user@example.com'}, content_type='application/json')
+
+    def test_repeat_within_cooldown_sends_nothing(self, task, may_exist):
+        self.assertEqual(self._post().status_code, 200)
+        self.assertEqual(self._post().status_code, 200)
+        task.delay.assert_called_once()
+
+    def test_enqueue_failure_releases_cooldown(self, task, may_exist):
+        task.delay.side_effect = ConnectionError("broker down")
+        with self.assertRaises(ConnectionError):
+            self._post()
+        task.delay.side_effect = None
+        self.assertEqual(self._post().status_code, 200)
+        self.assertEqual(task.delay.call_count, 2)
+
+
+class RoleProfileCacheSignalTests(SimpleTestCase):
+    def test_muted_profile_saves_skip_the_user_update(self):
+        profile = FarmerProfile(user_id=uuid.uuid4(), farm_name='Green Acres')
+        with mock.patch('accounts.signals._set_role_profile_cache') as set_cache:
+            with profile_signals_muted():
+                refresh_role_profile_cache(FarmerProfile, profile)
+            set_cache.assert_not_called()
+            refresh_role_profile_cache(FarmerProfile, profile)
+        set_cache.assert_called_once_with(profile, {'farm_name': 'Green Acres', 'farm_location': None})
@@ -0,0 +1,83 @@
+import hashlib
+import hmac
+import time
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+from django.utils.http import base36_to_int, int_to_base36
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from .cache import is_token_blacklisted, mark_token_blacklisted
+
+
+class PasswordResetTokenGenerator:
+    """
+    Stateless password reset tokens signed with a single HMAC-SHA256.
+
+    A token has the form `<timestamp>-<signature>`, where the signature covers
+    the user's primary key, current password hash and the timestamp. Resetting
+    the password therefore invalidates every outstanding token, and only `pk`
+    and `password` are needed, so tokens can be made straight from a values row.
+    """
+    key_salt = "accounts.tokens.PasswordResetTokenGenerator"
+
+    def make_token(self, user):
+        """
+        Return a token for the given user that can be used once to reset the password.
+        """
+        return self.make_token_for(user.pk, user.password)
+
+    def make_token_for(self, pk, password):
+        """
+        Same as `make_token`, from a user's primary key and password hash.
+        """
+        return self._make_token(pk, password, int(time.time()))
+
+    def check_token(self, user, token):
+        """
+        Check that a password reset token is valid for the given user and not expired.
+        """
+        if not (user and token):
+            return False
+        try:
+            ts_b36, signature = token.split("-", 1)
+            timestamp = base36_to_int(ts_b36)
+        except (AttributeError, ValueError):
+            # Not a string, no "-", or a timestamp that is not base 36
+            return False
+        if "-" in signature:
+            return False
+
+        if int(time.time()) - timestamp > settings.PASSWORD_RESET_TIMEOUT:
+            return False
+        return constant_time_compare(self._make_token(user.pk, user.password, timestamp), token)
+
+    def _make_token(self, pk, password, timestamp):
+        key = hashlib.sha256((self.key_salt + settings.SECRET_KEY).encode()).digest()
+        message = f"{pk}.{password}.{timestamp}".encode()
+        signature = hmac.new(key, message, hashlib.sha256).hexdigest()[:32]
+        return f"{int_to_base36(timestamp)}-{signature}"
+
+
+password_reset_token_generator = PasswordResetTokenGenerator()
+
+
+class CachedBlacklistRefreshToken(RefreshToken):
+    """
+    Refresh token whose blacklist entries are mirrored in the cache.
+
+    A blacklisted token is rejected from the cache without querying the
+    blacklist tables, and a token marked in the cache (e.g. by logout, before
+    its database row is written by the worker) is rejected right away.
+    """
+
+    def check_blacklist(self):
+        if is_token_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+        super().check_blacklist()
+
+    def blacklist(self):
+        blacklisted = super().blacklist()
+        mark_token_blacklisted(self.payload[api_settings.JTI_CLAIM], self.payload["exp"])
+        return blacklisted
@@ -10,6 +10,7 @@ urlpatterns = [
 
     # User registration and profile
     path('api/register/', views.UserRegistrationAPIView.as_view(), name='user-registration'),
+    path('api/register/bulk/', views.BulkUserRegistrationAPIView.as_view(), name='user-bulk-registration'),
     path('api/profile/', views.UserProfileAPIView.as_view(), name='user-profile'),
     path('api/farmer/', views.FarmerProfileAPIView.as_view(), name='farmer-profile'),
     path('api/consumer/', views.ConsumerProfileAPIView.as_view(), name='consumer-profile'),
@@ -23,5 +24,5 @@ urlpatterns = [
 
 
     # Logout
-    path('api/logout/', views.LogoutAPIView.as_view(), name='api_logout'),
+    path('api/logout/', views.logout_view, name='api_logout'),
 ]
\ No newline at end of file
@@ -1,22 +1,70 @@
+import json
+import logging
 from django.contrib.auth.password_validation import validate_password
-from rest_framework.generics import CreateAPIView, RetrieveUpdateAPIView, RetrieveUpdateDestroyAPIView
+from rest_framework.generics import CreateAPIView, RetrieveUpdateDestroyAPIView
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken, UntypedToken
 from rest_framework.response import Response
+from rest_framework.settings import api_settings as drf_settings
+from rest_framework.throttling import ScopedRateThrottle
 from rest_framework.views import APIView
 from rest_framework import status
-from .models import CustomUser
-from agrilink.tasks import send_email
+from .authentication import CachedJWTAuthentication
+from .cache import claim_password_reset, email_exists, email_may_exist, mark_token_blacklisted, release_password_reset
+from .models import CustomUser, FarmerProfile, ConsumerProfile
+from agrilink.tasks import blacklist_refresh_token, send_password_reset_email
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from .tokens import password_reset_token_generator
 from .serializers import UserRegisterSerializer, CustomUserSerializer, FarmerProfileSerializer, ConsumerProfileSerializer, PasswordResetSerializer
-from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.core.exceptions import ValidationError
 from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import require_GET, require_POST
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework.permissions import BasePermission
+from products.models import Product
+
+logger = logging.getLogger(__name__)
+
+# Shared swagger objects, built once at import
+_FORBIDDEN_RESPONSE = openapi.Response(description="Forbidden - User is not authenticated")
+_INVALID_INPUT_RESPONSE = openapi.Response(description="Bad Request - Invalid input data")
+_REGISTER_REQUEST_SCHEMA = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    required=["email", "role", "password", "confirm_password", "first_name", "last_name"],
+    properties={
+        "email": openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_EMAIL, example="user@example.com"),
+        "role": openapi.Schema(type=openapi.TYPE_STRING, enum=["farmer", "consumer"], example="farmer"),
+        "password": openapi.Schema(type=openapi.TYPE_STRING, format="password", example="SecurePassword123!"),
+        "confirm_password": openapi.Schema(type=openapi.TYPE_STRING, format="password", example="SecurePassword123!"),
+        "first_name": openapi.Schema(type=openapi.TYPE_STRING, example="John"),
+        "last_name": openapi.Schema(type=openapi.TYPE_STRING, example="Doe"),
+        "phone": openapi.Schema(type=openapi.TYPE_STRING, example="+254712345678"),
+        "profile_picture": openapi.Schema(type=openapi.TYPE_FILE, description="Optional profile picture"),
+    },
+)
+
+
+def get_user_with_profiles(request):
+    """
+    Return the requesting user with both role profiles joined.
+
+    Users resolved by `CachedJWTAuthentication` already carry their profiles, so
+    this only queries the database for other authenticators.
+    """
+    if isinstance(request.successful_authenticator, CachedJWTAuthentication):
+        return request.user
+    return CustomUser.objects.select_related('farmer_profile', 'consumer_profile').get(pk=request.user.pk)
 
 
 class IsConsumer(BasePermission):
@@ -25,8 +73,14 @@ class IsConsumer(BasePermission):
     """
 
     def has_permission(self, request, view):
-        # Allow if user is authenticated and has a consumer profile
-        return bool(request.user and request.user.is_authenticated and hasattr(request.user, 'consumer_profile'))
+        # Allow if user is authenticated and is a consumer
+        if not (request.user and request.user.is_authenticated):
+            return False
+        # The profile signals keep the profile in line with `role`, so no relation is touched
+        role = getattr(request.user, 'role', None)
+        if role is None:
+            return hasattr(request.user, 'consumer_profile')
+        return role == 'consumer'
 
     def has_object_permission(self, request, view, obj):
         # Ensure the user can only access their own consumer profile
@@ -39,15 +93,24 @@ class IsFarmer(BasePermission):
     """
 
     def has_permission(self, request, view):
-        # Ensure the user is authenticated and has a farmer profile
-        return bool(request.user and request.user.is_authenticated and hasattr(request.user, 'farmer_profile'))
+        # Ensure the user is authenticated and is a farmer
+        if not (request.user and request.user.is_authenticated):
+            return False
+        # The profile signals keep the profile in line with `role`, so no relation is touched
+        role = getattr(request.user, 'role', None)
+        if role is None:
+            return hasattr(request.user, 'farmer_profile')
+        return role == 'farmer'
 
     def has_object_permission(self, request, view, obj):
         # Ensure the user is the owner of the farmer profile they are accessing
         return obj.user == request.user
 
 
-@api_view(['GET'])
+_API_DOCUMENTATION_BODY = b'{"message":"See documentation at /swagger/"}'
+
+@require_GET
+@cache_control(max_age=86400, public=True)
 def api_documentation(request):
     """
     # Authentication
@@ -61,7 +124,8 @@ def api_documentation(request):
     
     More details can be found in the Swagger documentation.
     """
-    return Response({"message": "See documentation at /swagger/"})
+    # A constant body, so this is a plain Django view rather than a DRF one
+    return HttpResponse(_API_DOCUMENTATION_BODY, content_type='application/json')
 
 class UserRegistrationAPIView(CreateAPIView):
     """
@@ -90,20 +154,7 @@ class UserRegistrationAPIView(CreateAPIView):
         - ✅ **201 Created**: User registered successfully
         - ❌ **400 Bad Request**: Validation errors
         """,
-        request_body=openapi.Schema(
-            type=openapi.TYPE_OBJECT,
-            required=["email", "role", "password", "confirm_password", "first_name", "last_name"],
-            properties={
-                "email": openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_EMAIL, example="user@example.com"),
-                "role": openapi.Schema(type=openapi.TYPE_STRING, enum=["farmer", "consumer"], example="farmer"),
-                "password": openapi.Schema(type=openapi.TYPE_STRING, format="password", example="SecurePassword123!"),
-                "confirm_password": openapi.Schema(type=openapi.TYPE_STRING, format="password", example="SecurePassword123!"),
-                "first_name": openapi.Schema(type=openapi.TYPE_STRING, example="John"),
-                "last_name": openapi.Schema(type=openapi.TYPE_STRING, example="Doe"),
-                "phone": openapi.Schema(type=openapi.TYPE_STRING, example="+254712345678"),
-                "profile_picture": openapi.Schema(type=openapi.TYPE_FILE, description="Optional profile picture"),
-            },
-        ),
+        request_body=_REGISTER_REQUEST_SCHEMA,
         responses={
             201: openapi.Response(
                 description="User registered successfully",
@@ -117,14 +168,63 @@ class UserRegistrationAPIView(CreateAPIView):
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            user = serializer.save()  # User is created, signals handle profile creation
+            serializer.save()  # Creates the user together with its role profile
             
             return Response({
-                "user": CustomUserSerializer(user).data,  # Format user data for response
+                "user": serializer.data,  # Same shape as CustomUserSerializer; write-only fields are omitted
                 "message": "User registered successfully",
             }, status=status.HTTP_201_CREATED)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class BulkUserRegistrationAPIView(CreateAPIView):
+    """
+    Register several users in one request. Staff only.
+    """
+    queryset = CustomUser.objects.all()
+    serializer_class = UserRegisterSerializer
+    permission_classes = [IsAdminUser]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'bulk_register'
+
+    @swagger_auto_schema(
+        operation_summary="Register users in bulk",
+        operation_description="""
+        Creates the users in a JSON array of registration objects (same fields as
+        `api/register/`), with one INSERT per table for the whole batch.
+
+        **Permissions:**
+        - Staff users only.
+
+        **Responses:**
+        - ✅ **201 Created**: Users registered successfully
+        - ❌ **400 Bad Request**: Validation errors, repeated emails, or more than `BULK_REGISTER_MAX_USERS` users
+        - ❌ **403 Forbidden**: The user is not staff
+        """,
+        request_body=openapi.Schema(type=openapi.TYPE_ARRAY, items=_REGISTER_REQUEST_SCHEMA),
+        responses={
+            201: openapi.Response(
+                description="Users registered successfully",
+                schema=CustomUserSerializer(many=True)
+            ),
+            400: _INVALID_INPUT_RESPONSE,
+            403: openapi.Response(description="Forbidden - User is not staff"),
+        },
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(
+            data=request.data, many=True, allow_empty=False, max_length=settings.BULK_REGISTER_MAX_USERS
+        )
+        if serializer.is_valid():
+            serializer.save()  # One bulk INSERT per table for the whole batch
+
+            return Response({
+                "users": serializer.data,
+                "message": "Users registered successfully",
+            }, status=status.HTTP_201_CREATED)
+
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
 
 class UserProfileAPIView(RetrieveUpdateDestroyAPIView):
@@ -146,11 +246,9 @@ class UserProfileAPIView(RetrieveUpdateDestroyAPIView):
         responses={
             200: openapi.Response(
                 description="User profile retrieved successfully",
-                schema=CustomUserSerializer()
-            ),
-            403: openapi.Response(
-                description="Forbidden - User is not authenticated"
+                schema=CustomUserSerializer
             ),
+            403: _FORBIDDEN_RESPONSE,
         }
     )
     def get(self, request, *args, **kwargs):
@@ -179,14 +277,10 @@ class UserProfileAPIView(RetrieveUpdateDestroyAPIView):
         responses={
             200: openapi.Response(
                 description="User profile updated successfully",
-                schema=CustomUserSerializer()
-            ),
-            400: openapi.Response(
-                description="Bad Request - Invalid input data"
-            ),
-            403: openapi.Response(
-                description="Forbidden - User is not authenticated"
+                schema=CustomUserSerializer
             ),
+            400: _INVALID_INPUT_RESPONSE,
+            403: _FORBIDDEN_RESPONSE,
         }
     )
     def put(self, request, *args, **kwargs):
@@ -212,14 +306,10 @@ class UserProfileAPIView(RetrieveUpdateDestroyAPIView):
         responses={
             200: openapi.Response(
                 description="User profile partially updated successfully",
-                schema=CustomUserSerializer()
-            ),
-            400: openapi.Response(
-                description="Bad Request - Invalid input data"
-            ),
-            403: openapi.Response(
-                description="Forbidden - User is not authenticated"
+                schema=CustomUserSerializer
             ),
+            400: _INVALID_INPUT_RESPONSE,
+            403: _FORBIDDEN_RESPONSE,
         }
     )
     def patch(self, request, *args, **kwargs):
@@ -241,9 +331,7 @@ class UserProfileAPIView(RetrieveUpdateDestroyAPIView):
             204: openapi.Response(
                 description="User profile deleted successfully"
             ),
-            403: openapi.Response(
-                description="Forbidden - User is not authenticated"
-            ),
+            403: _FORBIDDEN_RESPONSE,
         }
     )
     def delete(self, request, *args, **kwargs):
@@ -251,10 +339,9 @@ class UserProfileAPIView(RetrieveUpdateDestroyAPIView):
 
     def get_object(self):
         """
-        Retrieve the current authenticated user.
+        Retrieve the current authenticated user with both role profiles joined.
         """
-
-        return self.request.user
+        return get_user_with_profiles(self.request)
 
 
 class FarmerProfileAPIView(RetrieveUpdateDestroyAPIView):
@@ -275,12 +362,12 @@ class FarmerProfileAPIView(RetrieveUpdateDestroyAPIView):
         """
         Retrieve the farmer profile associated with the requesting user.
 
-        If the user does not have a farmer profile, return a 404 response.
+        If the user does not have a farmer profile, raise a 404.
         """
-
-        if not hasattr(self.request.user, 'farmer_profile'):
-            return Response({"detail": "Farmer profile not found"}, status=status.HTTP_404_NOT_FOUND)
-        return self.request.user.farmer_profile
+        try:
+            return get_user_with_profiles(self.request).farmer_profile
+        except FarmerProfile.DoesNotExist:
+            raise Http404("Farmer profile not found")
     
 
 class ConsumerProfileAPIView(RetrieveUpdateDestroyAPIView):
@@ -299,11 +386,18 @@ class ConsumerProfileAPIView(RetrieveUpdateDestroyAPIView):
         """
         Return the consumer profile associated with the requesting user.
 
-        If the user has no consumer profile, return a 404 response.
+        If the user has no consumer profile, raise a 404.
         """
-        if not hasattr(self.request.user, 'consumer_profile'):
-            return Response({"detail": "Consumer profile not found"}, status=status.HTTP_404_NOT_FOUND)
-        return self.request.user.consumer_profile
+        try:
+            profile = get_user_with_profiles(self.request).consumer_profile
+        except ConsumerProfile.DoesNotExist:
+            raise Http404("Consumer profile not found")
+        # Load the preferred products, and the relations ProductSerializer reads, in one batch
+        prefetch_related_objects([profile], Prefetch(
+            'preferred_products',
+            queryset=Product.objects.select_related('seller', 'category').prefetch_related('images'),
+        ))
+        return profile
     
 @swagger_auto_schema(
     method='post',
@@ -352,49 +446,85 @@ def check_email(request):
     """
     Check if an email already exist in the database.
     """
-    email = request.data.get('email', '')
-    
+    email = request.data.get('email')
+    email = CustomUser.objects.normalize_email(email.strip()) if isinstance(email, str) else ''
+
     response = {
-        'email_exists': CustomUser.objects.filter(email=email).exists() if email else False
+        # Anything without an "@" could never have been registered, so skip the lookup
+        'email_exists': email_exists(email) if '@' in email else False
     }
     
     return Response(response)
 
 
 
-class LogoutAPIView(APIView):
+_LOGOUT_BODY = b'{"detail":"Successfully logged out."}'
+
+@csrf_exempt
+@require_POST
+def logout_view(request):
     """
     Log out the user by blacklisting the provided refresh token.
 
+    A plain Django view: the access token is checked by the configured JWT
+    authenticator, which also rejects deleted and inactive users, and the
+    blacklisting is queued, so none of DRF's request handling is needed.
+
     **Request Data:**
     - `refresh` (string): The refresh token to blacklist
 
     **Response:**
     - 200 OK: Successfully logged out
     - 400 Bad Request: If token is invalid
+    - 401 Unauthorized: If no valid access token is provided
     """
-    permission_classes = [IsAuthenticated]
-    
-    def post(self, request):
-        """
-        Blacklists the refresh token provided in the request body.
-
-        :param request: Request object containing the refresh token to be blacklisted
-        :return: Response indicating success or failure of the logout operation
-        """
+    # The class DRF views use, so a token is accepted or rejected the same way everywhere
+    authenticator = drf_settings.DEFAULT_AUTHENTICATION_CLASSES[0]()
+    try:
+        if authenticator.authenticate(request) is None:
+            raise AuthenticationFailed("Authentication credentials were not provided.", code='not_authenticated')
+    except AuthenticationFailed as e:
+        # Same body and headers DRF would send for a failed authentication
+        body = e.detail if isinstance(e.detail, dict) else {"detail": e.detail}
+        response = JsonResponse(body, status=status.HTTP_401_UNAUTHORIZED)
+        response['WWW-Authenticate'] = authenticator.authenticate_header(request)
+        return response
+
+    try:
+        if request.content_type == 'application/json':
+            data = json.loads(request.body or b"{}")
+        else:
+            # Form-encoded and multipart bodies, which DRF's default parsers accepted too
+            data = request.POST
+        refresh_token = data.get('refresh') if isinstance(data, dict) else None
+        if refresh_token:
+            # Only check the signature here; the blacklist INSERTs happen in the worker
+            token = UntypedToken(refresh_token)
+            if token.get(jwt_settings.TOKEN_TYPE_CLAIM) != RefreshToken.token_type:
+                raise TokenError("Token has wrong type")
+            # Refreshes are refused from now on, before the worker writes the blacklist row
+            mark_token_blacklisted(token[jwt_settings.JTI_CLAIM], token["exp"])
+    except (ValueError, TokenError) as e:
+        return JsonResponse({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if refresh_token:
         try:
-            refresh_token = request.data.get('refresh')
-            if refresh_token:
-                token = RefreshToken(refresh_token)
-                token.blacklist()
-           
-            return Response({"detail": "Successfully logged out."}, status=status.HTTP_200_OK)
-        except Exception as e:
-            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            blacklist_refresh_token.delay(refresh_token)
+        except Exception:
+            # The cache entry already refuses the token; only the database row is missing
+            logger.exception("Could not queue blacklisting of a refresh token")
+
+    return HttpResponse(_LOGOUT_BODY, content_type='application/json')
+
 
+# Identical for known, unknown and repeated emails, so the response reveals nothing
+PASSWORD_RESET_SENT_BODY = {"detail": "If a user with that email exists, a password reset email has been sent."}
 
 class PassWordResetAPIView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'password_reset'
+
     @swagger_auto_schema(
         operation_summary="Request Password Reset",
         operation_description="Sends a password reset link to the provided email if it exists in the system.",
@@ -403,9 +533,7 @@ class PassWordResetAPIView(APIView):
             200: openapi.Response(
                 description="Password reset email sent",
                 examples={
-                    "application/json": {
-                        "detail": "Password reset email has been sent"
-                    }
+                    "application/json": PASSWORD_RESET_SENT_BODY
                 }
             ),
             400: openapi.Response(
@@ -426,27 +554,35 @@ class PassWordResetAPIView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         email = serializer.validated_data["email"]
-        
+
+        # Repeats within the cooldown get the same answer without a lookup or an email
+        if not claim_password_reset(email):
+            return Response(PASSWORD_RESET_SENT_BODY, status=status.HTTP_200_OK)
+
         try:
-            user = CustomUser.objects.get(email=email)
-            uid = urlsafe_base64_encode(force_bytes(user.pk))
-            token = default_token_generator.make_token(user)
+            # A plain row is enough: the token only covers the pk and password hash
+            row = None
+            if email_may_exist(email):  # Emails the bloom filter has never seen skip the query
+                row = CustomUser.objects.filter(email__iexact=email).values_list('pk', 'email', 'password').first()
+            if row is None:
+                # Return success response to prevent email enumeration
+                return Response(PASSWORD_RESET_SENT_BODY, status=status.HTTP_200_OK)
+
+            pk, user_email, password_hash = row
+            uid = urlsafe_base64_encode(force_bytes(pk))
+            token = password_reset_token_generator.make_token_for(pk, password_hash)
             reset_link = f"{settings.FRONTEND_URL}accounts/api/password-reset/confirm/{uid}/{token}/"
 
+            send_password_reset_email.delay(user_email, reset_link)
+        except Exception:
+            # No email was queued, so a retry must not be answered from the cooldown
+            release_password_reset(email)
+            raise
 
-            subject = "Reset your password"
-            body = f"Click the link below to reset your password: {reset_link}"
-            
-            send_email.delay(email, subject, body)
+        return Response(PASSWORD_RESET_SENT_BODY, status=status.HTTP_200_OK)
 
-            return Response({"detail": "Password reset email has been sent"}, status=status.HTTP_200_OK)
-        
-        except CustomUser.DoesNotExist:
-            # Return success response to prevent email enumeration
-            return Response(
-                {"detail": "If a user with that email exists, a password reset email has been sent."},
-                status=status.HTTP_200_OK,
-            )
+# The token check reads `password`; the password validators compare against the rest
+PASSWORD_RESET_FIELDS = ('password', 'email', 'first_name', 'last_name')
 
 class PasswordResetConfirmAPIView(APIView):
     permission_classes = [AllowAny]
@@ -471,20 +607,22 @@ class PasswordResetConfirmAPIView(APIView):
         if not password:
             return Response({"detail": "Password is required."}, status=status.HTTP_400_BAD_REQUEST)
         
-        try:
-            user_id = force_str(urlsafe_base64_decode(uid))
-            user = CustomUser.objects.get(pk=user_id)
-        except (TypeError, ValueError, OverflowError, CustomUser.DoesNotExist):
-            return Response({"detail": "Invalid link or user does not exist"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        if not default_token_generator.check_token(user, token):
-            return Response({"detail": "Invalid or expired token"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        try:
-            validate_password(password, user)
-        except ValidationError as e:
-            return Response({"detail": e.message}, status=status.HTTP_400_BAD_REQUEST)
-        
-        user.set_password(password)
-        user.save()
+        # Lock the row so two concurrent submissions of the same link cannot both succeed
+        with transaction.atomic():
+            try:
+                user_id = force_str(urlsafe_base64_decode(uid))
+                user = CustomUser.objects.select_for_update().only(*PASSWORD_RESET_FIELDS).get(pk=user_id)
+            except (TypeError, ValueError, OverflowError, ValidationError, CustomUser.DoesNotExist):
+                return Response({"detail": "Invalid link or user does not exist"}, status=status.HTTP_400_BAD_REQUEST)
+
+            if not password_reset_token_generator.check_token(user, token):
+                return Response({"detail": "Invalid or expired token"}, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                validate_password(password, user)
+            except ValidationError as e:
+                return Response({"detail": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+
+            user.set_password(password)
+            user.save(update_fields=['password'])
         return Response({"detail": "Password has been reset successfully"}, status=status.HTTP_200_OK)
\ No newline at end of file
@@ -0,0 +1,27 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # e.g. platforms without orjson wheels
+    orjson = None
+
+# Handles the types orjson does not know about (Decimal, lazy translations, ...)
+_fallback_default = JSONEncoder().default
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSON renderer that encodes with orjson, falling back to DRF's stdlib encoder.
+
+    The stdlib encoder is still used when orjson is not installed and for
+    indented output (as requested by the browsable API), which orjson only
+    supports with a fixed width of two spaces.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(accepted_media_type or '', renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        return orjson.dumps(data, default=_fallback_default, option=orjson.OPT_NON_STR_KEYS)
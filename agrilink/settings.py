@@ -99,9 +99,17 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
         ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'agrilink.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
         ],
+    'DEFAULT_THROTTLE_RATES': {
+        'password_reset': '5/min',
+        'bulk_register': '10/hour',
+    },
 }
 
 
@@ -113,7 +121,8 @@ SIMPLE_JWT = {
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': env('JWT_SECRET_KEY'),
     'AUTH_HEADER_TYPES': ('Bearer',),
-    'TOKEN_BLACKLIST': True
+    'TOKEN_BLACKLIST': True,
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.CachedTokenRefreshSerializer',
 }
 
 MIDDLEWARE = [
@@ -157,12 +166,63 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 
 if DATABASE_URL:
     DATABASES = {
-        "default": dj_database_url.config(default=DATABASE_URL, conn_max_age=600, ssl_require=True)
+        "default": dj_database_url.config(
+            default=DATABASE_URL, conn_max_age=600, conn_health_checks=True, ssl_require=True
+        )
     }
+    # PgBouncer in transaction pooling mode cannot hold server-side cursors across transactions
+    DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = env.bool("DB_USE_PGBOUNCER", default=False)
 else:
     raise ValueError("DATABASE_URL is not set. Check your environment variables.")
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+REDIS_URL = env("REDIS_URL", default=None)
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+    # Cached users are only safe to serve when every process sees the same invalidations
+    REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'] = (
+        'accounts.authentication.CachedJWTAuthentication',
+    )
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/5.1/topics/auth/passwords/#using-argon2-with-django
+# Existing PBKDF2 hashes keep working and are upgraded to Argon2 on the next login.
+# Only one hasher per algorithm may be listed, so the tuned Argon2 replaces Django's.
+
+PASSWORD_HASHERS = [
+    'accounts.hashers.TunedArgon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Argon2 costs for TunedArgon2PasswordHasher; tune with `manage.py hash_benchmark`
+ARGON2_TIME_COST = env.int("ARGON2_TIME_COST", default=2)
+ARGON2_MEMORY_COST = env.int("ARGON2_MEMORY_COST", default=19 * 1024)  # KiB
+ARGON2_PARALLELISM = env.int("ARGON2_PARALLELISM", default=1)
+
+# Most users one staff bulk registration request may create
+BULK_REGISTER_MAX_USERS = env.int("BULK_REGISTER_MAX_USERS", default=100)
+# Threads hashing passwords in parallel during a bulk registration
+PASSWORD_HASH_WORKERS = env.int("PASSWORD_HASH_WORKERS", default=2)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -1,11 +1,15 @@
 from celery import shared_task
+import logging
 import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
 from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import RefreshToken
 
+logger = logging.getLogger(__name__)
 
-@shared_task
+
+@shared_task(autoretry_for=(smtplib.SMTPException, ConnectionError), retry_backoff=True)
 def send_email(recipient, subject, body):
     """
     Sends an email to the specified recipient with the given subject and body.
@@ -17,28 +21,41 @@ def send_email(recipient, subject, body):
 
     This function constructs an email message using the provided subject and body,
     and sends it to the recipient's email address using the SMTP server configured
-    in the Django settings. It handles exceptions during the email sending process
-    and prints a success or failure message accordingly.
+    in the Django settings. SMTP and connection errors are retried with exponential
+    backoff; other errors are reported and the email is dropped.
     """
 
     try:
-        msg = MIMEMultipart()
-        msg['From'] = settings.EMAIL_HOST_USER
-        msg['To'] = recipient
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'plain'))
+        _deliver_email(recipient, subject, body)
+        logger.info("Email sent successfully to %s", recipient)
+
+    except (smtplib.SMTPException, ConnectionError):
+        raise  # Let Celery retry transient failures
+
+    except Exception:
+        logger.exception("Failed to send email to %s", recipient)
 
-        server = smtplib.SMTP(settings.EMAIL_HOST, settings.EMAIL_PORT)
-        if settings.EMAIL_USE_TLS:
-            server.starttls()
-        server.login(settings.EMAIL_HOST_USER, settings.EMAIL_HOST_PASSWORD)
-        server.send_message(msg)
-        server.quit()
+def _deliver_email(recipient, subject, body):
+    """
+    Send a plain-text email through Django's configured email backend, raising on failure.
+    """
+    with get_connection(fail_silently=False) as connection:
+        EmailMessage(subject, body, settings.EMAIL_HOST_USER, [recipient], connection=connection).send()
 
-        print(f"Email sent successfully to {recipient}")
+@shared_task(bind=True, autoretry_for=(smtplib.SMTPException, ConnectionError), retry_backoff=True)
+def send_password_reset_email(self, recipient, reset_link):
+    """
+    Send a password reset link to the given recipient.
 
-    except Exception as e:
-        print(f"Failed to send email: {e}")
+    Unlike `send_email`, SMTP and connection errors are not swallowed: the task
+    is retried with exponential backoff so a transient mail server failure does
+    not lose the reset email.
+    """
+    subject = "Reset your password"
+    body = f"Click the link below to reset your password: {reset_link}"
+
+    _deliver_email(recipient, subject, body)
+    return f"Password reset email sent to {recipient}"
 
 @shared_task
 def send_order_confirmation_email(order_id, buyer_email):
@@ -48,5 +65,24 @@ def send_order_confirmation_email(order_id, buyer_email):
     subject = "Order Confirmation from Agrilink"
     body = f"Your order with ID {order_id} has been received and is being processed. Thank you for shopping with us!"
 
-    send_email(buyer_email, subject, body)
-    return f"Email sent to {buyer_email} for Order ID {order_id}"
+    # Queue the email as its own task so SMTP time and failures stay out of this one
+    send_email.apply_async(
+        args=[buyer_email, subject, body],
+        retry=True,
+        retry_policy={'max_retries': 3, 'interval_start': 1, 'interval_step': 2},
+    )
+    return f"Email queued to {buyer_email} for Order ID {order_id}"
+
+@shared_task
+def blacklist_refresh_token(raw_token):
+    """
+    Blacklist a refresh token on behalf of a logout request.
+
+    The token's signature has already been checked by the view; a token that
+    expired or was blacklisted in the meantime needs no further action.
+    """
+    try:
+        RefreshToken(raw_token).blacklist()
+    except TokenError:
+        return "Token already expired or blacklisted"
+    return "Token blacklisted"
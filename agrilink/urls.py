@@ -42,6 +42,10 @@ schema_view.security_definitions={
         }
     }
 
+# Introspecting every view to build the schema is expensive, so serve it from the cache
+SCHEMA_CACHE_TIMEOUT = 60 * 60
+SCHEMA_CACHE_KWARGS = {'key_prefix': 'swagger'}
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -50,8 +54,8 @@ urlpatterns = [
     path('orders/', include('orders.urls', namespace='orders')),
     path('', include('products.urls')),
 
-    path('swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    path('swagger<format>/', schema_view.without_ui(cache_timeout=SCHEMA_CACHE_TIMEOUT, cache_kwargs=SCHEMA_CACHE_KWARGS), name='schema-json'),
+    path('swagger/', schema_view.with_ui('swagger', cache_timeout=SCHEMA_CACHE_TIMEOUT, cache_kwargs=SCHEMA_CACHE_KWARGS), name='schema-swagger-ui'),
+    path('redoc/', schema_view.with_ui('redoc', cache_timeout=SCHEMA_CACHE_TIMEOUT, cache_kwargs=SCHEMA_CACHE_KWARGS), name='schema-redoc'),
     
 ]
@@ -1,11 +1,30 @@
-from decimal import Decimal, InvalidOperation
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
 from django.conf import settings
 from products.models import Product
 import logging
-import copy
 
 logger = logging.getLogger(__name__)
 
+CART_META_SESSION_ID = f"{settings.CART_SESSION_ID}_meta"
+
+# Product columns loaded for cart items (the primary key is always loaded); prices come from the session
+CART_PRODUCT_FIELDS = ('name',)
+
+
+def to_cents(amount):
+    """
+    Convert a price (Decimal, str or number) to an integer number of cents.
+    """
+    return int((Decimal(amount) * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents):
+    """
+    Convert an integer number of cents back to a two-place Decimal price.
+    """
+    return Decimal(cents).scaleb(-2)
+
+
 class Cart:
     def __init__(self, request):
         """
@@ -19,7 +38,19 @@ class Cart:
         if not cart:
             # save an empty cart in the session
             cart = self.session[settings.CART_SESSION_ID] = {}
-        self.cart = self._validate_cart(cart)
+        self._products = None  # Products in the cart, loaded on first iteration
+
+        # Running item count and total, kept next to the cart so len() and the total are O(1)
+        meta = self.session.get(CART_META_SESSION_ID)
+        if meta is not None and 'total_cents' in meta:
+            # Only save() writes the totals, together with a cart it built, so the
+            # cart is already valid; sessions are stored server-side (or signed)
+            self.cart = cart
+        else:
+            # Older sessions have no totals and may hold legacy entries
+            self.cart = self._validate_cart(cart)
+            meta = self._compute_meta()
+        self.meta = meta
 
     def _validate_cart(self, cart):
         """
@@ -29,14 +60,33 @@ class Cart:
         for product_id, item in cart.items():
             try:
                 quantity = int(item.get('quantity', 0))
-                price = Decimal(item.get('price'))
-                if quantity < 0 or price < 0:
+                if 'price_cents' in item:
+                    price_cents = int(item['price_cents'])
+                else:
+                    price_cents = to_cents(item.get('price'))  # Sessions saved before prices were stored in cents
+                if quantity < 0 or price_cents < 0:
                     raise ValueError("Negative values are not allowed.")
-                cleaned_cart[product_id] = {'quantity': quantity, 'price': str(price)}
+                cleaned_cart[product_id] = {'quantity': quantity, 'price_cents': price_cents}
             except (ValueError, InvalidOperation, TypeError) as e:
                 logger.error(f"Invalid cart data for product {product_id}: {e}")
         return cleaned_cart
 
+    def _compute_meta(self):
+        """
+        Compute the item count and total price of the cart from scratch.
+        """
+        return {
+            'count': sum(item['quantity'] for item in self.cart.values()),
+            'total_cents': sum(item['price_cents'] * item['quantity'] for item in self.cart.values()),
+        }
+
+    def _adjust_meta(self, price_cents, quantity_delta):
+        """
+        Apply a change of `quantity_delta` units at `price_cents` to the running totals.
+        """
+        self.meta['count'] += quantity_delta
+        self.meta['total_cents'] += price_cents * quantity_delta
+
     def add(self, product, quantity=1, update_quantity=False):
         """
         Add a product to the cart or update its quantity.
@@ -50,20 +100,23 @@ class Cart:
         product_id = str(product.id)
 
         try:
-            price = Decimal(product.price)
-            if price <= 0:
+            price_cents = to_cents(product.price)
+            if price_cents <= 0:
                 raise ValueError("Product price must be greater than zero.")
         except (InvalidOperation, TypeError, ValueError) as e:
             logger.error(f"Invalid price for product {product_id}: {e}")
             raise
 
         if product_id not in self.cart:
-            self.cart[product_id] = {'quantity': 0, 'price': str(price)}
+            self.cart[product_id] = {'quantity': 0, 'price_cents': price_cents}
 
+        item = self.cart[product_id]
+        previous_quantity = item['quantity']
         if update_quantity:
-            self.cart[product_id]['quantity'] = max(0, quantity)
+            item['quantity'] = max(0, quantity)
         else:
-            self.cart[product_id]['quantity'] = max(0, self.cart[product_id]['quantity'] + quantity)
+            item['quantity'] = max(0, previous_quantity + quantity)
+        self._adjust_meta(item['price_cents'], item['quantity'] - previous_quantity)
 
         self.save()
 
@@ -73,11 +126,17 @@ class Cart:
         This method should be called after any changes to the cart
         to ensure the session is updated with the latest cart state.
         """
-        for item in self.cart.values():
-            item['price'] = str(item['price'])
-            item.pop('total_price', None)
         self.session[settings.CART_SESSION_ID] = self.cart
+        self.session[CART_META_SESSION_ID] = self.meta
         self.session.modified = True
+        self._products = None  # The set of products may have changed
+
+    def quantity_of(self, product_id):
+        """
+        Return the quantity of a product in the cart, 0 if it is not in the cart.
+        """
+        item = self.cart.get(str(product_id))
+        return item['quantity'] if item is not None else 0
 
     def remove(self, product):
         """
@@ -87,9 +146,19 @@ class Cart:
         Returns
         None
         """
-        product_id = str(product.id)
-        if product_id in self.cart:
-            del self.cart[product_id]
+        self.remove_by_id(product.id)
+
+    def remove_by_id(self, product_id):
+        """
+        Remove a product from the cart by its id, without loading the product.
+        Parameters
+        product_id (int | str): The id of the product to remove.
+        Returns
+        None
+        """
+        item = self.cart.pop(str(product_id), None)
+        if item is not None:
+            self._adjust_meta(item['price_cents'], -item['quantity'])
             self.save()
 
     def __iter__(self):
@@ -98,27 +167,31 @@ class Cart:
         Yields:
             dict: A dictionary containing the product, quantity, and computed prices.
         """
-        product_ids = self.cart.keys()
-        
-        # Fetch product objects and store them in a dictionary for faster lookup
-        products = {str(product.id): product for product in Product.objects.filter(id__in=product_ids)}
-        
-        # Work on a copy to avoid modifying self.cart directly
-        cart_copy = copy.deepcopy(self.cart)
-
-        for product_id, item in cart_copy.items():
-            item['product'] = products.get(product_id)
-            
+        products = self._get_products()
+
+        # Snapshot the keys and build a fresh dict per item, so self.cart is never
+        # modified and never copied as a whole
+        for product_id in list(self.cart):
+            stored = self.cart.get(product_id)
+            if stored is None:
+                continue  # Removed while iterating
+            item = {
+                'quantity': stored['quantity'],
+                'price_cents': stored['price_cents'],
+                'product': products.get(product_id),
+            }
+
             try:
-                item['price'] = Decimal(item['price'])
-                if item['price'] <= 0:
+                price_cents = item['price_cents']
+                item['price'] = from_cents(price_cents)
+                if price_cents <= 0:
                     raise ValueError(f"Negative or zero price for product {product_id}: {item['price']}")
                 
                 item['quantity'] = int(item['quantity'])
                 if item['quantity'] <= 0:
                     raise ValueError(f"Invalid quantity for product {product_id}: {item['quantity']}")
 
-                item['total_price'] = item['price'] * item['quantity']
+                item['total_price'] = from_cents(price_cents * item['quantity'])
 
             except (InvalidOperation, TypeError, ValueError) as e:
                 logger.error(f"Cart data error for product {product_id}: {e}")
@@ -126,13 +199,24 @@ class Cart:
 
             yield item
 
+    def _get_products(self):
+        """
+        Return the products in the cart keyed by id, fetching them once per cart instance.
+
+        Only the columns read by cart and order views are loaded.
+        """
+        if self._products is None:
+            products = Product.objects.only(*CART_PRODUCT_FIELDS).in_bulk(list(self.cart))
+            self._products = {str(product_id): product for product_id, product in products.items()}
+        return self._products
+
     def __len__(self):
         """
         Return the total number of items in the cart.
         Returns
         int: The total number of items in the cart.
         """
-        return sum(item['quantity'] for item in self.cart.values())
+        return self.meta['count']
     
     def get_total_price(self):
         """
@@ -140,8 +224,7 @@ class Cart:
         Returns
         Decimal: The total price of all items in the cart.
         """
-        return sum(Decimal(item['price']) * item['quantity']
-                   for item in self.cart.values())
+        return from_cents(self.meta['total_cents'])
     
     def clear(self):
         """
@@ -149,5 +232,9 @@ class Cart:
         """
         if settings.CART_SESSION_ID in self.session:
             self.session[settings.CART_SESSION_ID] = {}  # Reset cart instead of deleting
+            self.session.pop(CART_META_SESSION_ID, None)
             self.session.modified = True  # Ensure Django saves session changes
+        self.cart = {}
+        self.meta = self._compute_meta()
+        self._products = None
 
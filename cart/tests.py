@@ -1,3 +1,128 @@
-from django.test import TestCase
+from decimal import Decimal
+from types import SimpleNamespace
+from django.conf import settings
+from django.contrib.sessions.backends.signed_cookies import SessionStore
+from django.test import SimpleTestCase
+from .cart import CART_META_SESSION_ID, Cart
 
-# Create your tests here.
+
+def _product(product_id, price):
+    return SimpleNamespace(id=product_id, price=Decimal(price))
+
+
+class CartTests(SimpleTestCase):
+    def setUp(self):
+        self.request = SimpleNamespace(session=SessionStore())
+        self.apple = _product(1, '0.35')
+        self.maize = _product(2, '12.50')
+
+    def assertMeta(self, cart, count, total):
+        self.assertEqual(len(cart), count)
+        self.assertEqual(cart.get_total_price(), Decimal(total))
+        # The running totals always agree with a full recount
+        self.assertEqual(cart.meta, cart._compute_meta())
+        self.assertEqual(self.request.session[CART_META_SESSION_ID], cart.meta)
+
+    def test_empty_cart(self):
+        cart = Cart(self.request)
+        self.assertEqual(len(cart), 0)
+        self.assertEqual(cart.get_total_price(), Decimal('0.00'))
+
+    def test_add(self):
+        cart = Cart(self.request)
+        cart.add(self.apple)
+        cart.add(self.apple, quantity=2)
+        cart.add(self.maize, quantity=3)
+        self.assertEqual(cart.quantity_of(1), 3)
+        self.assertEqual(cart.quantity_of(2), 3)
+        self.assertMeta(cart, 6, '38.55')
+        self.assertTrue(self.request.session.modified)
+
+    def test_add_with_update_quantity(self):
+        cart = Cart(self.request)
+        cart.add(self.maize, quantity=5)
+        cart.add(self.maize, quantity=2, update_quantity=True)
+        self.assertEqual(cart.quantity_of(2), 2)
+        self.assertMeta(cart, 2, '25.00')
+
+        cart.add(self.maize, quantity=-4, update_quantity=True)
+        self.assertEqual(cart.quantity_of(2), 0)
+        self.assertMeta(cart, 0, '0.00')
+
+    def test_add_never_goes_below_zero(self):
+        cart = Cart(self.request)
+        cart.add(self.apple, quantity=2)
+        cart.add(self.apple, quantity=-5)
+        self.assertEqual(cart.quantity_of(1), 0)
+        self.assertMeta(cart, 0, '0.00')
+
+    def test_add_keeps_the_price_of_the_first_add(self):
+        cart = Cart(self.request)
+        cart.add(self.maize)
+        cart.add(_product(2, '99.00'))
+        self.assertMeta(cart, 2, '25.00')
+
+    def test_add_rejects_non_positive_price(self):
+        cart = Cart(self.request)
+        with self.assertRaises(ValueError), self.assertLogs('cart.cart', level='ERROR'):
+            cart.add(_product(3, '0.00'))
+        self.assertEqual(cart.quantity_of(3), 0)
+        self.assertEqual(len(cart), 0)
+
+    def test_remove(self):
+        cart = Cart(self.request)
+        cart.add(self.apple, quantity=4)
+        cart.add(self.maize)
+        cart.remove(self.apple)
+        self.assertEqual(cart.quantity_of(1), 0)
+        self.assertMeta(cart, 1, '12.50')
+
+    def test_remove_missing_product(self):
+        cart = Cart(self.request)
+        cart.add(self.maize)
+        cart.remove_by_id(99)
+        self.assertMeta(cart, 1, '12.50')
+
+    def test_totals_survive_a_new_cart_instance(self):
+        cart = Cart(self.request)
+        cart.add(self.apple, quantity=3)
+        cart.add(self.maize)
+        cart = Cart(self.request)
+        self.assertMeta(cart, 4, '13.55')
+
+    def test_clear(self):
+        cart = Cart(self.request)
+        cart.add(self.maize, quantity=2)
+        cart.clear()
+        self.assertEqual(self.request.session[settings.CART_SESSION_ID], {})
+        self.assertNotIn(CART_META_SESSION_ID, self.request.session)
+        self.assertEqual(len(cart), 0)
+        self.assertEqual(len(Cart(self.request)), 0)
+
+    def test_missing_meta_is_recomputed(self):
+        self.request.session[settings.CART_SESSION_ID] = {
+            '1': {'quantity': 3, 'price_cents': 35},
+            '2': {'quantity': 1, 'price_cents': 1250},
+        }
+        cart = Cart(self.request)
+        self.assertEqual(cart.meta, {'count': 4, 'total_cents': 1355})
+        cart.add(self.apple)
+        self.assertMeta(cart, 5, '13.90')
+
+    def test_stale_meta_is_recomputed(self):
+        # Meta written before totals were kept in cents
+        self.request.session[settings.CART_SESSION_ID] = {'2': {'quantity': 2, 'price_cents': 1250}}
+        self.request.session[CART_META_SESSION_ID] = {'count': 7}
+        cart = Cart(self.request)
+        self.assertEqual(cart.meta, {'count': 2, 'total_cents': 2500})
+
+    def test_legacy_and_invalid_entries_without_meta(self):
+        self.request.session[settings.CART_SESSION_ID] = {
+            '1': {'quantity': 2, 'price': '0.35'},  # Saved before prices were stored in cents
+            '2': {'quantity': 'many', 'price_cents': 1250},
+            '3': {'quantity': -1, 'price_cents': 100},
+        }
+        with self.assertLogs('cart.cart', level='ERROR'):
+            cart = Cart(self.request)
+        self.assertEqual(cart.cart, {'1': {'quantity': 2, 'price_cents': 35}})
+        self.assertEqual(cart.meta, {'count': 2, 'total_cents': 70})
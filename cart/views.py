@@ -9,10 +9,11 @@ from .serializers import CartAddProductSerializer
 from products.models import Product
 from rest_framework.exceptions import ValidationError
 import logging
-from decimal import Decimal
 
 logger = logging.getLogger(__name__)
 
+CART_ADD_PRODUCT_FIELDS = ('name', 'price', 'stock_quantity', 'is_available', 'unit')
+
 class CartAddProductView(APIView):
     """
     Add a product to the cart or update its quantity.
@@ -68,7 +69,8 @@ class CartAddProductView(APIView):
     def post(self, request, product_id):
         cart = Cart(request)
         
-        self.product = get_object_or_404(Product, id=product_id)
+        # Only the columns read by the stock checks, the cart and the response
+        self.product = get_object_or_404(Product.objects.only(*CART_ADD_PRODUCT_FIELDS), id=product_id)
         
         serializer = CartAddProductSerializer(
             data=request.data,
@@ -80,7 +82,7 @@ class CartAddProductView(APIView):
             quantity = data['quantity']
             override = data['override']
 
-            current_quantity = cart.cart.get(str(self.product.id), {}).get('quantity', 0)
+            current_quantity = cart.quantity_of(self.product.id)
             new_quantity = quantity if override else current_quantity + quantity
 
             if new_quantity > self.product.stock_quantity:
@@ -140,23 +142,22 @@ class CartRemoveProductView(APIView):
         }
     )
     def post(self, request, product_id):
-        cart = Cart(request)        
+        cart = Cart(request)
+        pid = str(product_id)  # Cart keys are strings; convert once
 
         # Check if the product is in the cart
-        if str(product_id) not in cart.cart:
+        if pid not in cart.cart:
             return Response(
                 {'detail': 'Product not found in cart.'},
                 status=status.HTTP_404_NOT_FOUND
             )
-        
-        product = get_object_or_404(Product, id=product_id)
 
-        # Remove product and log action
+        # Remove product and log action; the cart is keyed by id, so the product row is not needed
         try:
-            cart.remove(product)
-            logger.info(f"Product {product.id} removed from cart.")
+            cart.remove_by_id(pid)
+            logger.info(f"Product {product_id} removed from cart.")
         except Exception as e:
-            logger.error(f"Error removing product {product.id} from cart: {e}")
+            logger.error(f"Error removing product {product_id} from cart: {e}")
             return Response(
                 {'detail': 'Error removing product from cart.'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -170,15 +171,15 @@ class CartRemoveProductView(APIView):
                     'product_id': item['product'].id,
                     'product_name': item['product'].name,
                     'quantity': item['quantity'],
-                    'price': str(item['price'].quantize(Decimal('0.01'))),
-                    'total_price': str(item['total_price'].quantize(Decimal('0.01'))),
+                    'price': str(item['price']),
+                    'total_price': str(item['total_price']),
                 })
             except Exception as e:
                 logger.error(f"Error processing cart item {item}: {e}")
 
         # Get total price safely
         try:
-            total_price = str(format(cart.get_total_price(), '.2f'))
+            total_price = str(cart.get_total_price())
         except Exception as e:
             logger.error(f"Error calculating total cart price: {e}")
             total_price = "0.00"
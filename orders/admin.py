@@ -3,7 +3,7 @@ from .models import Order, OrderItem
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
-    raw_id_fields = ['product']
+    autocomplete_fields = ['product']  # Paginated search instead of a full product lookup
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
@@ -11,9 +11,10 @@ class OrderAdmin(admin.ModelAdmin):
         'id', 'user', 'is_paid', 'total_price', 'status', 'created_at', 'updated_at'
     ]
     list_filter = ['is_paid', 'status', 'created_at', 'updated_at']
+    list_select_related = ['user']  # list_display renders the user's email
     inlines = [OrderItemInline]
 
     def save_model(self, request, obj, form, change):
         """Automatically calculate total price before saving."""
-        obj.total_price = sum(item.get_total() for item in obj.items.all())
+        obj.total_price = obj.get_total_price()
         super().save_model(request, obj, form, change)
@@ -1,7 +1,9 @@
 # orders/models.py
 
 import uuid
+from decimal import Decimal
 from django.db import models
+from django.db.models import F, Sum
 from django.conf import settings
 from products.models import Product
 
@@ -23,6 +25,12 @@ class Order(models.Model):
         default='pending'
     )
 
+    class Meta:
+        indexes = [
+            # Serves the per-user order history pages, newest first
+            models.Index(fields=['user', '-created_at'], name='idx_order_user_created'),
+        ]
+
     def __str__(self):
         """
         Return a human-readable string representation of the order.
@@ -36,12 +44,20 @@ class Order(models.Model):
         """
         Return the total price of all items in the order.
 
+        Uses the items when they were prefetched, otherwise sums them in SQL with a
+        single aggregate query instead of loading every item.
+
         Returns
         -------
         Decimal
             The total price of all items in the order.
         """
-        return sum(item.get_total() for item in self.items.all())
+        if 'items' in getattr(self, '_prefetched_objects_cache', {}):
+            return sum((item.get_total() for item in self.items.all()), Decimal('0.00'))
+        total = self.items.aggregate(
+            total=Sum(F('price') * F('quantity'), output_field=models.DecimalField(max_digits=12, decimal_places=2))
+        )['total']
+        return total if total is not None else Decimal('0.00')
 
 class OrderItem(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, unique=True)
@@ -1,3 +1,65 @@
-from django.test import TestCase
+from decimal import Decimal
+from unittest import mock
+from django.conf import settings
+from django.test import TransactionTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from accounts.models import CustomUser
+from products.models import Category, Product
+from .models import Order, OrderItem
 
-# Create your tests here.
+
+# Transactions really commit here, so on_commit callbacks run when the view's
+# atomic block ends, before the session is saved, as they do in production
+@mock.patch('orders.views.send_order_confirmation_email')
+class OrderCreateTests(TransactionTestCase):
+    def setUp(self):
+        seller = CustomUser.objects.create_user(email='seller@example.com', password='x', role='farmer')
+        category = Category.objects.create(name='Vegetables')
+        self.product = Product.objects.create(
+            seller=seller, category=category, name='Tomatoes', description='Fresh',
+            price=Decimal('12.50'), unit='kg', stock_quantity=10,
+        )
+        self.buyer = CustomUser.objects.create_user(email='buyer@example.com', password='x', role='consumer')
+        self.client = APIClient()
+        self.client.force_authenticate(self.buyer)
+        self.client.post(
+            reverse('cart:cart_add', args=[self.product.id]), {'quantity': 2, 'override': False}, format='json'
+        )
+        self.url = reverse('orders:order_create')
+
+    def test_creates_order_from_cart(self, task):
+        response = self.client.post(self.url, {}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        order = Order.objects.get(pk=response.data['order_id'])
+        self.assertEqual(order.user, self.buyer)
+        self.assertEqual(order.total_price, Decimal('25.00'))
+        item = order.items.get()
+        self.assertEqual((item.product_id, item.quantity, item.price), (self.product.id, 2, Decimal('12.50')))
+
+    def test_queues_email_and_clears_cart_after_commit(self, task):
+        response = self.client.post(self.url, {}, format='json')
+        task.delay.assert_called_once_with(str(response.data['order_id']), self.buyer.email)
+        self.assertEqual(self.client.session[settings.CART_SESSION_ID], {})
+
+    def test_rolled_back_order_sends_nothing_and_keeps_cart(self, task):
+        with mock.patch.object(OrderItem.objects, 'bulk_create', side_effect=RuntimeError("insert failed")):
+            with self.assertRaises(RuntimeError):
+                self.client.post(self.url, {}, format='json')
+        self.assertFalse(Order.objects.exists())
+        task.delay.assert_not_called()
+        self.assertIn(str(self.product.id), self.client.session[settings.CART_SESSION_ID])
+
+    def test_queue_failure_does_not_fail_order(self, task):
+        task.delay.side_effect = ConnectionError("broker down")
+        with self.assertLogs('orders.views', level='ERROR'):
+            response = self.client.post(self.url, {}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Order.objects.filter(pk=response.data['order_id']).exists())
+
+    def test_empty_cart(self, task):
+        self.client.post(self.url, {}, format='json')
+        response = self.client.post(self.url, {}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Order.objects.count(), 1)
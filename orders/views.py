@@ -1,17 +1,33 @@
+import logging
+from functools import partial
 from rest_framework import generics, permissions
 from .serializers import OrderSerializer
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from cart.cart import Cart
+from django.db import transaction
+from django.db.models import Prefetch
 from .models import OrderItem, Order
+from .pagination import OrderCursorPagination
 from agrilink.tasks import send_order_confirmation_email
-from .serializers import OrderSerializer
 from rest_framework.permissions import IsAuthenticated
 
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
+logger = logging.getLogger(__name__)
+
+def queue_order_confirmation_email(order_id, email):
+    """
+    Send a confirmation email asynchronously using Celery, without failing the order.
+    """
+    try:
+        send_order_confirmation_email.delay(order_id, email)
+    except Exception:
+        logger.exception("Could not queue the confirmation email for order %s", order_id)
+
+
 class OrderCreateAPIView(APIView):
     """
     API endpoint to create an order from the cart.
@@ -66,25 +82,21 @@ class OrderCreateAPIView(APIView):
         serializer = OrderSerializer(data=request.data, context={'request': request})
 
         if serializer.is_valid():
-            order = serializer.save()
-
-            # Create order items from the cart
-            order_items = [
-                OrderItem(order=order, product=item['product'], price=item['price'], quantity=item['quantity'])
-                for item in cart
-            ]
-          
-            OrderItem.objects.bulk_create(order_items)
-
-            # Clear the cart after order creation
-            cart.clear()
-
-            try:
-                # Send a confirmation email asynchronously using Celery
-                send_order_confirmation_email.delay(order.id, request.user.email)
-            except Exception as e:
-                print(f"Error sending order confirmation email: {e}")
-
+            # Create order items from the cart, iterating it (and loading its products) once
+            cart_items = list(cart)
+
+            # The order and its items are committed together, or not at all
+            with transaction.atomic():
+                # Store the total with the order so reads never have to sum its items
+                order = serializer.save(total_price=cart.get_total_price())
+                order_items = [
+                    OrderItem(order=order, product=item['product'], price=item['price'], quantity=item['quantity'])
+                    for item in cart_items
+                ]
+                OrderItem.objects.bulk_create(order_items, batch_size=500)
+                # Never enqueue an email, or empty the cart, for an order that is rolled back
+                transaction.on_commit(partial(queue_order_confirmation_email, str(order.id), request.user.email))
+                transaction.on_commit(cart.clear)
 
             return Response(
                 {"message": "Order created successfully", "order_id": order.id},
@@ -105,31 +117,43 @@ class UserOrderListAPIView(generics.ListAPIView):
     - 🔒 **Authentication required** (User must be logged in)
 
     ### Response:
-    - ✅ **200 OK**: Returns a list of orders belonging to the authenticated user.
+    - ✅ **200 OK**: Returns a page of orders belonging to the authenticated user, newest first.
     - ❌ **401 Unauthorized**: If the user is not authenticated.
 
     ### Example Response:
     ```json
-    [
-        {
-            "id": "b4d5f2a6-8c23-4f6c-a9b3-e5e5c729ad3b",
-            "user": "a8aacd39-fb86-4bee-9009-a24a361a17da",
-            "status": "pending",
-            "total_price": "3500.00",
-            "created_at": "2024-03-06T12:34:56Z",
-            "order_items": [
-                {
-                    "product": "Tomatoes",
-                    "quantity": 10,
-                    "price": "500.00"
-                }
-            ]
-        }
-    ]
+    {
+        "next": "https://agrilink-nnwc.onrender.com/orders/list/?cursor=cD0yMDI0LTAzLTA2",
+        "previous": null,
+        "results": [
+            {
+                "id": "b4d5f2a6-8c23-4f6c-a9b3-e5e5c729ad3b",
+                "user": "a8aacd39-fb86-4bee-9009-a24a361a17da",
+                "status": "pending",
+                "total_price": "3500.00",
+                "created_at": "2024-03-06T12:34:56Z",
+                "order_items": [
+                    {
+                        "product": "Tomatoes",
+                        "quantity": 10,
+                        "price": "500.00"
+                    }
+                ]
+            }
+        ]
+    }
     ```
     """
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OrderCursorPagination  # Pages stay the same size however long the order history grows
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user).order_by('-created_at')
+        # OrderSerializer reads the user and each item's product name: load them in one batch
+        items = OrderItem.objects.select_related('product').only('order_id', 'quantity', 'price', 'product__name')
+        return (
+            Order.objects.filter(user=self.request.user)
+            .select_related('user')
+            .prefetch_related(Prefetch('items', queryset=items))
+            .order_by('-created_at')
+        )
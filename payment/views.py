@@ -1,6 +1,7 @@
 from decimal import Decimal
 import stripe
 from django.conf import settings
+from django.core.cache import cache
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from rest_framework.decorators import api_view, permission_classes
@@ -14,6 +15,8 @@ from .models import Payment
 stripe.api_key = settings.STRIPE_SECRET_KEY
 stripe.api_version = settings.STRIPE_API_VERSION
 
+STRIPE_EVENT_DEDUPE_TIMEOUT = 60 * 60 * 24  # Stripe retries failed deliveries for up to 3 days, mostly within hours
+
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -33,9 +36,10 @@ def create_checkout_session(request):
     """
 
     order_id = request.data.get('order_id')
-    order = get_object_or_404(Order, id=order_id, user=request.user)
+    # The total is stored on the order when it is created, so no items are read here
+    order = get_object_or_404(Order.objects.only('id', 'is_paid', 'total_price'), id=order_id, user=request.user)
 
-    if order.paid:
+    if order.is_paid:
         return Response({"detail": "This order has already been paid."}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
@@ -90,10 +94,20 @@ def stripe_webhook(request):
     except (ValueError, stripe.error.SignatureVerificationError):
         return Response({"detail": "Invalid payload or signature."}, status=status.HTTP_400_BAD_REQUEST)
 
+    # Stripe redelivers events until acknowledged; handle each event id only once
+    dedupe_key = f"stripe:evt:{event['id']}"
+    if not cache.add(dedupe_key, 1, timeout=STRIPE_EVENT_DEDUPE_TIMEOUT):
+        return Response(status=status.HTTP_200_OK)
+
     # Handle checkout session completion
-    if event['type'] == 'checkout.session.completed':
-        session = event['data']['object']
-        handle_successful_payment(session)
+    try:
+        if event['type'] == 'checkout.session.completed':
+            session = event['data']['object']
+            handle_successful_payment(session)
+    except Exception:
+        # Release the claim so Stripe's retry of this event is handled, not skipped
+        cache.delete(dedupe_key)
+        raise
 
     return Response(status=status.HTTP_200_OK)
 
@@ -102,14 +116,14 @@ def handle_successful_payment(session):
     """
     Update order and payment status after successful Stripe payment.
     """
+    # Two single-column UPDATEs instead of loading and re-saving both rows
     try:
-        payment = Payment.objects.get(stripe_checkout_id=session['id'])
-        order = payment.order
-        order.paid = True
-        order.save()
-
-        payment.status = 'completed'
-        payment.save()
-
+        payment_id, order_id = (
+            Payment.objects.filter(stripe_checkout_id=session['id'])
+            .values_list('pk', 'order_id')
+            .get()
+        )
     except Payment.DoesNotExist:
-        pass
+        return
+    Order.objects.filter(pk=order_id).update(is_paid=True)
+    Payment.objects.filter(pk=payment_id).update(status='completed')
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from django.db.models import Count, Sum
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
 from .models import Category, Product, ProductImage
 
@@ -23,14 +24,23 @@ class CategoryAdmin(admin.ModelAdmin):
     list_filter = ['is_approved', 'parent', 'created_at']
     search_fields = ['name', 'description']
     prepopulated_fields = {'slug': ('name',)}
+    raw_id_fields = ['parent', 'created_by']  # Lookup widgets instead of <select>s of every row
     actions = ['approve_selected']
     
     def get_queryset(self, request):
         """
         Optimize queryset with annotated product count.
         """
+        # A correlated count per category instead of aggregating a JOIN of all products
+        product_counts = (
+            Product.objects.filter(category=OuterRef('pk'))
+            .order_by()
+            .values('category')
+            .annotate(c=Count('*'))
+            .values('c')
+        )
         return super().get_queryset(request).annotate(
-            product_count=Count('products', distinct=True)
+            product_count=Coalesce(Subquery(product_counts, output_field=IntegerField()), 0)
         )
     
     def product_count(self, obj):
@@ -106,7 +116,9 @@ class ProductAdmin(admin.ModelAdmin):
         'is_available', 
         'created_at'
     ]
-    search_fields = ['name', 'description', 'seller__username']
+    search_fields = ['name', 'description', 'seller__email']  # Also drives the order item autocomplete
+    raw_id_fields = ['seller']  # Lookup widget instead of a <select> of every user
+    autocomplete_fields = ['category']
     
     # Include product images inline
     inlines = [ProductImageInline]
@@ -137,16 +149,20 @@ class ProductAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related(
             'seller', 'category'
         ).annotate(
-            total_sales=Sum('stock_quantity')
+            # A per-row expression: sortable without a GROUP BY over the products
+            total_value=ExpressionWrapper(
+                F('price') * F('stock_quantity'),
+                output_field=DecimalField(max_digits=14, decimal_places=2),
+            )
         )
     
     def total_sales_value(self, obj):
         """
-        Calculate and display total sales value.
+        Display the value of the product's stock (price x stock quantity).
         """
-        return f"${obj.price * obj.stock_quantity:.2f}"
+        return f"${obj.total_value:.2f}"
     total_sales_value.short_description = 'Total Value'
-    total_sales_value.admin_order_field = 'total_sales'
+    total_sales_value.admin_order_field = 'total_value'
 
 
 @admin.register(ProductImage)
@@ -1,6 +1,6 @@
 from django_filters import rest_framework as filters
 from .models import Category, Product
-from django.db.models import Q
+from django.db.models import Exists, OuterRef, Q
 
 class CategoryFilter(filters.FilterSet):
     """FilterSet for filtering categories."""
@@ -21,7 +21,8 @@ class CategoryFilter(filters.FilterSet):
     def filter_has_products(self, queryset, name, value):
         """Filter categories that have products."""
         if value:
-            return queryset.filter(Q(products__isnull=False)).distinct()
+            # EXISTS stops at the first product per category; a JOIN needs DISTINCT over all of them
+            return queryset.filter(Exists(Product.objects.filter(category_id=OuterRef('pk'))))
         return queryset
 
 
@@ -48,9 +49,10 @@ class ProductFilter(filters.FilterSet):
         Filter products by farm name.
 
         Returns a queryset of products whose seller's farm name contains the
-        given value (case-insensitive).
+        given value (case-insensitive). The farm name lives on the farmer profile,
+        where the trigram indexes on `farm_name` serve the ILIKE.
         """
-        return queryset.filter(Q(seller__farm_name__icontains=value) | Q(seller__company_name__icontains=value))
+        return queryset.filter(seller__farmer_profile__farm_name__icontains=value)
 
     def filter_in_stock(self, queryset, name, value):
         """
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.6 on 2026-10-14 06:32
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False  # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+
+    dependencies = [
+        ('products', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(fields=['category', 'is_available', '-created_at'], name='idx_prod_cat_avail_created'),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_available', True), ('stock_quantity__gt', 0)), fields=['category', '-created_at'], name='idx_prod_avail_by_cat'),
+        ),
+    ]
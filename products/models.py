@@ -1,7 +1,10 @@
-from django.db import models
+import secrets
+from django.db import IntegrityError, models, transaction
 from django.conf import settings
 from django.utils.text import slugify
 
+SLUG_ATTEMPTS = 5  # Random suffixes make a second clash very unlikely
+
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(unique=True, db_index=True)
@@ -102,6 +105,14 @@ class Product(models.Model):
             models.Index(fields=["stock_quantity"], name="idx_product_stock"),
             models.Index(fields=["is_available"], name="idx_product_available"),
             models.Index(fields=["created_at"], name="idx_product_created"),
+            # Category listings, newest first, with or without the availability filter
+            models.Index(fields=["category", "is_available", "-created_at"], name="idx_prod_cat_avail_created"),
+            # In-stock listings (`in_stock=true`) per category, newest first
+            models.Index(
+                fields=["category", "-created_at"],
+                condition=models.Q(is_available=True, stock_quantity__gt=0),
+                name="idx_prod_avail_by_cat",
+            ),
         ]
         ordering = ['-created_at']
     
@@ -110,21 +121,36 @@ class Product(models.Model):
         Overridden save method that assigns a slug if none is provided.
         
         If no slug is provided, it will be generated from the product's name.
-        If the generated slug already exists, a counter will be appended to it
-        until a unique slug is found.
+        If the generated slug already exists, the insert fails on the unique
+        index and is retried with a short random suffix appended.
+        Products that already have a slug are saved directly, with no slug work.
         """
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-            base_slug = self.slug
-            counter = 1
+        if self.slug:
+            return super().save(*args, **kwargs)
 
-            # Ensure slug uniqueness
-            while Product.objects.filter(slug=self.slug).exists():
-                self.slug = f"{base_slug}-{counter}"
-                counter += 1
+        # Let the unique index detect clashes instead of probing for free slugs first
+        max_length = self._meta.get_field('slug').max_length
+        base_slug = slugify(self.name)[:max_length]
+        self.slug = base_slug
+        for attempt in range(SLUG_ATTEMPTS):
+            try:
+                with transaction.atomic():  # Savepoint, so a clash leaves an outer transaction usable
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                # Only a taken slug is worth another attempt; any other violation is re-raised as is
+                if attempt == SLUG_ATTEMPTS - 1 or not self._slug_taken():
+                    raise
+                suffix = secrets.token_hex(3)
+                self.slug = f"{base_slug[:max_length - len(suffix) - 1]}-{suffix}"
 
-        super().save(*args, **kwargs)
+    def _slug_taken(self):
+        """
+        Return True if another product already has this product's slug.
+
+        Checked against the table instead of the violated constraint's name, which
+        depends on how the unique index was created.
+        """
+        return type(self)._default_manager.filter(slug=self.slug).exclude(pk=self.pk).exists()
     
     def __str__(self):
         """
@@ -86,12 +86,11 @@ class ProductSerializer(serializers.ModelSerializer):
         """
         Retrieve the farm name associated with the seller's farmer profile.
 
-        If the seller's farmer profile has a farm name, return it. Otherwise,
-        return None.
+        Read from the seller's `role_profile_cache`, so listing products does not
+        query the farmer profile of every seller. Returns None if the seller has
+        no farm name.
         """
-        if hasattr(obj.seller, 'farmer_profile'):
-            return getattr(obj.seller.farmer_profile, "farm_name", None)
-        return None
+        return obj.seller.role_profile_cache.get("farm_name")
 
 
     def get_primary_image(self, obj):
@@ -1,3 +1,51 @@
+from decimal import Decimal
+from unittest import mock
+from django.db import IntegrityError, models
 from django.test import TestCase
+from accounts.models import CustomUser
+from .models import SLUG_ATTEMPTS, Category, Product
 
-# Create your tests here.
+
+class ProductSlugTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = CustomUser.objects.create_user(email='seller@example.com', password='x', role='farmer')
+        cls.category = Category.objects.create(name='Vegetables')
+
+    def _product(self, name='Fresh Tomatoes', **kwargs):
+        return Product(
+            seller=self.seller, category=self.category, name=name, description='Fresh',
+            price=Decimal('12.50'), unit='kg', **kwargs,
+        )
+
+    def test_slug_from_name(self):
+        product = self._product()
+        product.save()
+        self.assertEqual(product.slug, 'fresh-tomatoes')
+
+    def test_explicit_slug_is_kept(self):
+        product = self._product(slug='my-tomatoes')
+        product.save()
+        self.assertEqual(product.slug, 'my-tomatoes')
+
+    def test_clash_retries_with_suffix(self):
+        self._product().save()
+        with mock.patch('products.models.secrets.token_hex', return_value='a1b2c3'):
+            product = self._product()
+            product.save()
+        self.assertEqual(product.slug, 'fresh-tomatoes-a1b2c3')
+        self.assertEqual(Product.objects.filter(slug__startswith='fresh-tomatoes').count(), 2)
+
+    def test_gives_up_after_all_attempts_clash(self):
+        self._product().save()
+        self._product(slug='fresh-tomatoes-a1b2c3').save()
+        with mock.patch('products.models.secrets.token_hex', return_value='a1b2c3') as token_hex:
+            with self.assertRaises(IntegrityError):
+                self._product().save()
+        self.assertEqual(token_hex.call_count, SLUG_ATTEMPTS - 1)
+
+    def test_other_integrity_errors_are_not_retried(self):
+        with mock.patch.object(models.Model, 'save', side_effect=IntegrityError('null value in column "price"')) as save:
+            with self.assertRaises(IntegrityError):
+                self._product().save()
+        save.assert_called_once()